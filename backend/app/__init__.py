@@ -1,4 +1,6 @@
+import multiprocessing
 import os
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -13,7 +15,25 @@ migrate = Migrate()
 jwt = JWTManager()
 
 
-def create_app():
+def serves_requests(app):
+    """Whether this process is the one that will serve the app, and so owns the cameras.
+
+    The reloader's watcher process loads the app too but only restarts the
+    child that serves it (marked by WERKZEUG_RUN_MAIN); multiprocessing
+    children such as the inference worker import it without serving; tests
+    use the test client.
+    """
+    if app.testing or multiprocessing.parent_process() is not None:
+        return False
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        return True
+    # flask run turns the reloader on with --reload, or by default with --debug
+    ctx = click.get_current_context(silent=True)
+    reload = ctx.params.get('reload') if ctx is not None else None
+    return not (app.debug if reload is None else reload)
+
+
+def create_app(test_config=None):
     app = Flask(__name__)
     
     # Configuration
@@ -25,6 +45,8 @@ def create_app():
     # File upload config
     app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uploads')
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+    if test_config:
+        app.config.update(test_config)
     
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -34,10 +56,15 @@ def create_app():
     migrate.init_app(app, db)
     jwt.init_app(app)
     
-    # CORS - allow frontend
+    # Background garment segmentation for product images
+    from app.utils.segmentation import segmentation
+    segmentation.init_app(app)
+    
+    # CORS - allow frontend (the stream server allows the same origins)
+    app.config['CORS_ORIGINS'] = ["http://localhost:5173", "http://127.0.0.1:5173"]
     CORS(app, resources={
         r"/api/*": {
-            "origins": ["http://localhost:5173", "http://127.0.0.1:5173"],
+            "origins": app.config['CORS_ORIGINS'],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"]
         }
@@ -58,8 +85,13 @@ def create_app():
     app.register_blueprint(sessions_bp, url_prefix='/api/sessions')
     app.register_blueprint(gestures_bp, url_prefix='/api/gestures')
 
+    # Video and event streams are served by an event-loop server next to the API so open
+    # viewers don't hold Flask worker threads. 0 disables it
+    stream_port = int(os.getenv('GESTURE_STREAM_PORT', '5001'))
+    if stream_port and serves_requests(app):
+        from app.utils.stream_server import stream_server
+        stream_server.start(port=stream_port, origins=app.config['CORS_ORIGINS'])
 
-    
     # Health check route
     @app.route('/api/health')
     def health():
@@ -21,7 +21,7 @@ class Product(db.Model):
     # Images
     image_url = db.Column(db.String(255))
     
-    # Segmentation data (for future use)
+    # Garment mask computed in the background (app/utils/segmentation.py), served under /uploads/masks
     segmentation_mask_path = db.Column(db.String(255))
     segmentation_ready = db.Column(db.Boolean, default=False)
     
@@ -40,6 +40,7 @@ class Product(db.Model):
             'clothing_type': self.clothing_type,
             'image_url': self.image_url,
             'segmentation_ready': self.segmentation_ready,
+            'segmentation_mask_path': self.segmentation_mask_path,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -1,50 +1,261 @@
-from flask import Blueprint, jsonify, Response, current_app
-import os
-import time
-from app.utils.gesture_engine import engine
+from flask import Blueprint, jsonify, Response, current_app, request
+from app.models.product import Product
+from app.utils.engine_registry import registry
+from app.utils.garment_overlay import GarmentAsset
+from app.utils.segmentation import resolve_image
+from app.utils.gesture_engine import STOPPED
+from app.utils.event_stream import encode_binary, encode_json, parse_last_event_id
+from app.utils.stream_server import stream_server
+from app.utils.stream_hub import parse_variant
 
 gestures_bp = Blueprint('gestures', __name__)
 
-@gestures_bp.route('/start', methods=['POST'])
-def start_gestures():
+# Every route works on the default kiosk (camera 0) or on /<kiosk_id>/... for a
+# kiosk configured in GESTURE_KIOSKS or a bare device index.
+DEFAULT_KIOSK = {'kiosk_id': 'default'}
+
+
+def get_engine(kiosk_id):
+    engine = registry.get(kiosk_id)
+    if engine is None:
+        return None, (jsonify({'success': False, 'error': f'Unknown kiosk: {kiosk_id}'}), 404)
+    return engine, None
+
+@gestures_bp.route('/kiosks', methods=['GET'])
+def list_kiosks():
+    """Configured kiosks and whether their engines are running"""
+    engines = dict(registry.items())
+    return jsonify({
+        'success': True,
+        'data': [
+            {
+                'kiosk_id': key,
+                'device': device,
+                'is_running': key in engines and engines[key].is_running,
+                'state': engines[key].state if key in engines else STOPPED
+            }
+            for key, device in registry.kiosks.items()
+        ],
+        'inference_workers': registry.pool.workers
+    })
+
+@gestures_bp.route('/start', methods=['POST'], defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/start', methods=['POST'])
+def start_gestures(kiosk_id):
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+
     success = engine.start()
     if success:
         return jsonify({'success': True, 'message': 'Gesture control started'})
     else:
         return jsonify({
-            'success': False, 
+            'success': False,
             'error': 'Could not start camera. Ensure it is not being used by the browser.'
         }), 500
 
-@gestures_bp.route('/stop', methods=['POST'])
-def stop_gestures():
+@gestures_bp.route('/stop', methods=['POST'], defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/stop', methods=['POST'])
+def stop_gestures(kiosk_id):
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+
     engine.stop()
     return jsonify({'success': True, 'message': 'Gesture control stopped'})
 
-@gestures_bp.route('/status', methods=['GET'])
-def get_status():
+@gestures_bp.route('/status', methods=['GET'], defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/status', methods=['GET'])
+def get_status(kiosk_id):
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+
     return jsonify({
-        'success': True, 
-        'is_running': engine.is_running
+        'success': True,
+        'is_running': engine.is_running,
+        'state': engine.state
     })
 
-def gen_frames():
+@gestures_bp.route('/metrics', methods=['GET'], defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/metrics', methods=['GET'])
+def get_metrics(kiosk_id):
+    """Per-stage latency percentiles (ms), fps counters and dropped-frame counts."""
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+
+    return jsonify({
+        'success': True,
+        'data': engine.get_metrics(),
+        'stream_server': stream_server.stats()
+    })
+
+def stream_hub(engine):
+    """The hub of the stream variant the query asks for.
+
+    ?overlay=1 has landmarks and garments drawn on; width, fps and quality
+    give a smaller or slower stream, shared by everyone asking for the same.
+    """
+    try:
+        hub = engine.stream_variant(**parse_variant(request.args))
+    except ValueError:
+        return None, (jsonify({'success': False, 'error': 'width, fps and quality must be numbers'}), 400)
+    if hub is None:
+        return None, (jsonify({'success': False, 'error': 'Too many stream variants in use'}), 503)
+    return hub, None
+
+def gen_frames(engine, hub):
     """Video streaming generator function."""
-    while engine.is_running:
-        frame = engine.get_frame()
-        if frame is None:
-            time.sleep(0.01)
-            continue
-        
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-        time.sleep(0.01)
-
-@gestures_bp.route('/video_feed')
-def video_feed():
-    """Video streaming route. Put this in the src attribute of an img tag."""
+    last_seq = 0
+    hub.attach()
+    try:
+        while engine.is_running:
+            frame = hub.wait_for(last_seq, timeout=1.0)
+            if frame is None:
+                continue
+            last_seq = frame.seq
+
+            # Yield the shared JPEG buffer as its own chunk so it is never copied per viewer.
+            # Part headers carry the capture time so clients can measure glass-to-glass latency.
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\n'
+                   b'Content-Length: %d\r\nX-Frame-Seq: %d\r\nX-Capture-Timestamp: %.6f\r\n\r\n'
+                   % (len(frame.data), frame.seq, frame.timestamp))
+            yield frame.data
+            yield b'\r\n'
+    finally:
+        hub.detach()
+
+@gestures_bp.route('/video_feed', defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/video_feed')
+def video_feed(kiosk_id):
+    """Video streaming route. Put this in the src attribute of an img tag.
+
+    The frames are the clean camera image; add ?overlay=1 for hand landmarks drawn on,
+    and width, fps or quality for a smaller stream (e.g. ?width=320&fps=10 for a thumbnail).
+    """
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+
+    hub, error = stream_hub(engine)
+    if error:
+        return error
+
     if not engine.is_running:
         engine.start() # Autostart if feed requested
-        
-    return Response(gen_frames(),
+
+    return Response(gen_frames(engine, hub),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@gestures_bp.route('/garments', methods=['GET', 'POST'], defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/garments', methods=['GET', 'POST'])
+def garments(kiosk_id):
+    """Garments composited onto the overlay stream. POST {"upper": product_id, "lower": product_id}, null clears."""
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        for slot in ('upper', 'lower'):
+            if slot not in data:
+                continue
+            if data[slot] is None:
+                engine.garments.select(slot, None)
+                continue
+
+            product = Product.query.get(data[slot])
+            if product is None:
+                return jsonify({'success': False, 'error': f'Product not found: {data[slot]}'}), 404
+            upload_folder = current_app.config['UPLOAD_FOLDER']
+            source = resolve_image(product.image_url, upload_folder)
+            if source is None:
+                return jsonify({'success': False, 'error': 'Product has no usable image'}), 400
+            # Use the precomputed mask when the segmentation job has finished
+            mask_path = None
+            if product.segmentation_ready:
+                mask_path = resolve_image(product.segmentation_mask_path, upload_folder)
+            # clothing_type defaults to 'upper', so unless a product is marked lower or full length
+            # the slot it was sent in says where it is worn (jeans picked as the bottom go on the hips)
+            kind = product.clothing_type if product.clothing_type in ('lower', 'full') else slot
+            try:
+                asset = GarmentAsset.load(product.id, kind, source, mask_path=mask_path)
+            except (OSError, ValueError) as e:
+                return jsonify({'success': False, 'error': f'Could not load garment image: {e}'}), 422
+            engine.garments.select(slot, asset)
+
+    return jsonify({
+        'success': True,
+        'data': engine.garments.selection()
+    })
+
+def gen_events(engine, binary, last_event_id=None):
+    """Landmark/gesture packet generator: length-prefixed binary or Server-Sent Events.
+
+    Starts with the next packet, or after last_event_id when a client resumes.
+    """
+    last_seq = engine.events.attach(last_event_id)
+    try:
+        while engine.is_running:
+            packets = engine.events.wait_for(last_seq, timeout=1.0)
+            if not packets:
+                # SSE comment line keeps proxies from timing out an idle stream
+                if not binary:
+                    yield ': keep-alive\n\n'
+                continue
+            last_seq = packets[-1].seq
+
+            if binary:
+                yield b''.join(encode_binary(p) for p in packets)
+            else:
+                yield ''.join(f'id: {p.seq}\ndata: {encode_json(p)}\n\n' for p in packets)
+    finally:
+        engine.events.detach()
+
+@gestures_bp.route('/events', defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/events')
+def events(kiosk_id):
+    """Per-frame hand landmarks and gesture events. ?format=json (SSE, default) or binary."""
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+    if not engine.is_running:
+        return jsonify({'success': False, 'error': 'Gesture control is not running'}), 409
+
+    binary = request.args.get('format', 'json') == 'binary'
+    mimetype = 'application/octet-stream' if binary else 'text/event-stream'
+    last_event_id = parse_last_event_id(request.headers.get('Last-Event-ID'))
+    response = Response(gen_events(engine, binary, last_event_id), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@gestures_bp.route('/snapshot', defaults=DEFAULT_KIOSK)
+@gestures_bp.route('/<kiosk_id>/snapshot')
+def snapshot(kiosk_id):
+    """Single JPEG of the most recent frame from the stream hub (?overlay=1 for landmarks)."""
+    engine, error = get_engine(kiosk_id)
+    if error:
+        return error
+
+    hub, error = stream_hub(engine)
+    if error:
+        return error
+    frame = hub.latest()
+    if engine.is_running and (frame is None or hub.subscribers == 0):
+        # Nobody is streaming, so the latest frame may be stale: ask for a fresh encode
+        hub.attach()
+        try:
+            frame = hub.wait_for(frame.seq if frame else 0, timeout=2.0) or frame
+        finally:
+            hub.detach()
+    if frame is None:
+        return jsonify({'success': False, 'error': 'No frame available'}), 503
+
+    response = Response(frame.data, mimetype='image/jpeg')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Frame-Seq'] = str(frame.seq)
+    response.headers['X-Frame-Timestamp'] = f'{frame.timestamp:.6f}'
+    return response
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 from app import db
 from app.models.product import Product
+from app.utils.segmentation import remove_upload, segmentation
 import os
 import uuid
 
@@ -14,6 +15,14 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def parse_outlet_id(value):
+    """outlet_id from a request body as an int, or None when it is not a whole number"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
 @products_bp.route('', methods=['GET'])
 def get_products():
     """Get all products, optionally filtered by outlet_id"""
@@ -59,7 +68,12 @@ def create_product():
                 'error': f'Missing required field: {field}'
             }), 400
     
-    outlet_id = int(data['outlet_id'])
+    outlet_id = parse_outlet_id(data['outlet_id'])
+    if outlet_id is None:
+        return jsonify({
+            'success': False,
+            'error': 'outlet_id must be an integer'
+        }), 400
     
     # Check product limit based on subscription
     from app.models.subscription import Subscription
@@ -103,9 +117,13 @@ def create_product():
     db.session.add(product)
     db.session.commit()
     
+    # Segment the garment in the background so try-on never has to
+    job = segmentation.enqueue(product.id) if product.image_url else None
+    
     return jsonify({
         'success': True,
         'data': product.to_dict(),
+        'segmentation_job': job,
         'message': 'Product created successfully'
     }), 201
 
@@ -114,6 +132,7 @@ def create_product():
 def update_product(product_id):
     """Update an existing product"""
     product = Product.query.get_or_404(product_id)
+    old_image_url = product.image_url
     
     if request.is_json:
         data = request.get_json()
@@ -143,11 +162,19 @@ def update_product(product_id):
             file.save(filepath)
             product.image_url = f"/uploads/{filename}"
     
+    # A new image needs a new mask; the old one stays on disk until the job replaces it
+    image_changed = product.image_url != old_image_url
+    if image_changed:
+        product.segmentation_ready = False
+    
     db.session.commit()
     
+    job = segmentation.enqueue(product.id) if image_changed and product.image_url else None
+    
     return jsonify({
         'success': True,
         'data': product.to_dict(),
+        'segmentation_job': job,
         'message': 'Product updated successfully'
     })
 
@@ -156,9 +183,11 @@ def update_product(product_id):
 def delete_product(product_id):
     """Delete a product"""
     product = Product.query.get_or_404(product_id)
+    mask_path = product.segmentation_mask_path
     
     db.session.delete(product)
     db.session.commit()
+    remove_upload(mask_path, current_app.config['UPLOAD_FOLDER'])
     
     return jsonify({
         'success': True,
@@ -174,3 +203,75 @@ def get_categories():
         'success': True,
         'data': [c[0] for c in categories]
     })
+
+
+@products_bp.route('/<int:product_id>/segmentation', methods=['GET'])
+def get_segmentation(product_id):
+    """Segmentation mask state of a product and its most recent job"""
+    product = Product.query.get_or_404(product_id)
+    return jsonify({
+        'success': True,
+        'data': {
+            'segmentation_ready': product.segmentation_ready,
+            'segmentation_mask_path': product.segmentation_mask_path,
+            'job': segmentation.latest_job(product.id)
+        }
+    })
+
+
+@products_bp.route('/<int:product_id>/segmentation', methods=['POST'])
+def resegment_product(product_id):
+    """Queue a new segmentation mask for one product"""
+    product = Product.query.get_or_404(product_id)
+    if not product.image_url:
+        return jsonify({
+            'success': False,
+            'error': 'Product has no image to segment'
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'data': segmentation.enqueue(product.id)
+    }), 202
+
+
+@products_bp.route('/segmentation/reprocess', methods=['POST'])
+def reprocess_segmentation():
+    """Queue segmentation for a catalog: {"outlet_id": optional, "only_missing": true by default}"""
+    data = request.get_json(silent=True) or {}
+    
+    query = Product.query.filter(Product.image_url.isnot(None))
+    if data.get('outlet_id'):
+        outlet_id = parse_outlet_id(data['outlet_id'])
+        if outlet_id is None:
+            return jsonify({
+                'success': False,
+                'error': 'outlet_id must be an integer'
+            }), 400
+        query = query.filter_by(outlet_id=outlet_id)
+    if data.get('only_missing', True):
+        query = query.filter(db.or_(Product.segmentation_ready.is_(False), Product.segmentation_ready.is_(None)))
+    
+    jobs = [segmentation.enqueue(product.id) for product in query.all()]
+    return jsonify({
+        'success': True,
+        'data': jobs,
+        'count': len(jobs),
+        'pending': segmentation.pending()
+    }), 202
+
+
+@products_bp.route('/segmentation/jobs/<job_id>', methods=['GET'])
+def get_segmentation_job(job_id):
+    """Status of one segmentation job: queued, running, done, failed or skipped"""
+    job = segmentation.job(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown or expired job'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job
+    })
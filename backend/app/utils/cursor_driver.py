@@ -0,0 +1,185 @@
+import collections
+import threading
+import time
+
+
+class CursorDriver:
+    """Where the gesture engine sends cursor output.
+
+    Coordinates are screen pixels. Drivers must never block the caller for
+    long: the engine calls them from its gesture stage.
+    """
+    name = 'base'
+
+    def __init__(self, screen=(1920, 1080)):
+        self._screen = screen
+
+    def screen_size(self):
+        return self._screen
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def move_to(self, x, y):
+        pass
+
+    def click(self):
+        pass
+
+    def mouse_down(self):
+        pass
+
+    def mouse_up(self):
+        pass
+
+    def scroll(self, steps):
+        pass
+
+
+class NullDriver(CursorDriver):
+    """Discards all output: for headless servers where the browser draws the cursor from /events"""
+    name = 'null'
+
+
+class RecordingDriver(CursorDriver):
+    """Keeps every call as (time, action, args) for tests and benchmarks"""
+    name = 'recording'
+
+    def __init__(self, screen=(1920, 1080)):
+        super().__init__(screen)
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def _record(self, action, *args):
+        with self._lock:
+            self.calls.append((time.monotonic(), action, args))
+
+    def move_to(self, x, y):
+        self._record('move', x, y)
+
+    def click(self):
+        self._record('click')
+
+    def mouse_down(self):
+        self._record('down')
+
+    def mouse_up(self):
+        self._record('up')
+
+    def scroll(self, steps):
+        self._record('scroll', steps)
+
+    def clear(self):
+        with self._lock:
+            self.calls = []
+
+
+class PyAutoGuiDriver(CursorDriver):
+    """Moves the real OS cursor through pyautogui from a dedicated output thread.
+
+    pyautogui's PAUSE is set to 0 so no call sleeps. Moves are coalesced: only
+    the newest target is kept, so a slow OS call never builds a backlog. Button
+    and scroll actions are queued in order, each preceded by the move that was
+    pending when it was issued.
+    """
+    name = 'pyautogui'
+
+    def __init__(self):
+        import pyautogui
+        pyautogui.PAUSE = 0
+        self._pyautogui = pyautogui
+        super().__init__(tuple(pyautogui.size()))
+
+        self._cond = threading.Condition()
+        self._target = None
+        self._actions = collections.deque()
+        self._running = False
+        self._thread = None
+
+    def open(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True, name='cursor-output')
+            self._thread.start()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def move_to(self, x, y):
+        with self._cond:
+            self._target = (x, y)
+            self._cond.notify()
+
+    def _queue(self, action, *args):
+        with self._cond:
+            if self._target is not None:
+                self._actions.append(('move', self._target))
+                self._target = None
+            self._actions.append((action, args))
+            self._cond.notify()
+
+    def click(self):
+        self._queue('click')
+
+    def mouse_down(self):
+        self._queue('mouseDown')
+
+    def mouse_up(self):
+        self._queue('mouseUp')
+
+    def scroll(self, steps):
+        self._queue('scroll', steps)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._target is not None or self._actions or not self._running)
+                if not self._running and not self._actions and self._target is None:
+                    return
+                actions = list(self._actions)
+                self._actions.clear()
+                if self._target is not None:
+                    actions.append(('move', self._target))
+                    self._target = None
+
+            for action, args in actions:
+                try:
+                    if action == 'move':
+                        self._pyautogui.moveTo(*args)
+                    else:
+                        getattr(self._pyautogui, action)(*args)
+                except Exception as e:
+                    print(f"Cursor output error ({action}): {e}")
+
+
+DRIVERS = {
+    PyAutoGuiDriver.name: PyAutoGuiDriver,
+    NullDriver.name: NullDriver,
+    RecordingDriver.name: RecordingDriver,
+}
+
+
+def get_driver(name='pyautogui'):
+    """Build the named driver. pyautogui falls back to the null driver when there is no display."""
+    if isinstance(name, CursorDriver):
+        return name
+    driver_cls = DRIVERS.get(name)
+    if driver_cls is None:
+        raise ValueError(f"Unknown cursor driver: {name}")
+    try:
+        return driver_cls()
+    except Exception as e:
+        if driver_cls is PyAutoGuiDriver:
+            print(f"pyautogui unavailable ({e}), cursor output disabled")
+            return NullDriver()
+        raise
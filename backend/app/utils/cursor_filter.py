@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class CursorPredictor:
+    """Fills in cursor positions between hand-inference results.
+
+    Inference runs slower than the cursor is updated, so between two results
+    the position is extrapolated from the velocity of the last two
+    observations. Extrapolation is capped at `max_horizon` seconds so a hand
+    that stops or leaves the frame does not send the cursor flying.
+    """
+
+    def __init__(self, max_horizon=0.1):
+        self.max_horizon = max_horizon
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.pos = None
+        self.velocity = np.zeros(2)
+
+    def observe(self, t, pos):
+        pos = np.asarray(pos, dtype=np.float64)
+        if self.pos is not None and t > self.t:
+            self.velocity = (pos - self.pos) / (t - self.t)
+        self.t, self.pos = t, pos
+
+    def predict(self, t):
+        if self.pos is None:
+            return None
+        dt = min(max(t - self.t, 0.0), self.max_horizon)
+        return self.pos + self.velocity * dt
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al.) for 2-D cursor positions.
+
+    A low-pass filter whose cutoff rises with speed: a still hand gets heavy
+    smoothing (no jitter), a fast move gets almost none (little lag). `lead`
+    adds velocity * lead seconds to the output to compensate for the latency
+    of the capture and inference stages.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0, lead=0.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.lead = lead
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.x = None
+        self.dx = np.zeros(2)
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, t, x):
+        x = np.asarray(x, dtype=np.float64)
+        if self.x is None or t <= self.t:
+            if self.x is None:
+                self.t, self.x = t, x
+            return self.x + self.dx * self.lead
+
+        dt = t - self.t
+        dx = (x - self.x) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.dx = self.dx + a_d * (dx - self.dx)
+
+        cutoff = self.min_cutoff + self.beta * np.linalg.norm(self.dx)
+        a = self._alpha(cutoff, dt)
+        self.x = self.x + a * (x - self.x)
+        self.t = t
+        return self.x + self.dx * self.lead
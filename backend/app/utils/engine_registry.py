@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+
+from app.utils.gesture_engine import GestureEngine
+
+
+class InferencePool:
+    """A fixed set of inference workers shared by every camera engine.
+
+    Workers pick engines round-robin and always take that engine's newest
+    captured frame, so with more cameras than workers each camera simply gets
+    a lower inference rate instead of the CPU being oversubscribed. An engine
+    is never run by two workers at once (its detector keeps tracking state),
+    and its inference_hz limit is respected.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self._cond = threading.Condition()
+        self._engines = []
+        self._busy = set()
+        self._next = 0
+        self._threads = []
+
+    def register(self, engine):
+        with self._cond:
+            if engine not in self._engines:
+                self._engines.append(engine)
+            if not self._threads:
+                self._threads = [
+                    threading.Thread(target=self._run, daemon=True, name=f"inference-worker-{i}")
+                    for i in range(self.workers)
+                ]
+                for thread in self._threads:
+                    thread.start()
+            self._cond.notify_all()
+
+    def unregister(self, engine, timeout=2.0):
+        """Stop scheduling an engine, waiting up to `timeout` for a worker still running it."""
+        with self._cond:
+            if engine in self._engines:
+                self._engines.remove(engine)
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: engine not in self._busy, timeout)
+
+    def notify(self):
+        """Called by an engine after it captures a frame."""
+        with self._cond:
+            self._cond.notify()
+
+    def _next_job(self):
+        """Pick the next engine in round-robin order with a frame that is due. Returns (engine, frame, wait)."""
+        now = time.monotonic()
+        soonest = None
+        count = len(self._engines)
+        for offset in range(count):
+            i = (self._next + offset) % count
+            engine = self._engines[i]
+            if engine in self._busy or not engine.infer_slot.pending:
+                continue
+            wait = engine.next_inference - now
+            if wait > 0:
+                soonest = wait if soonest is None else min(soonest, wait)
+                continue
+            frame = engine.infer_slot.get(timeout=0)
+            if frame is not None:
+                self._next = (i + 1) % count
+                return engine, frame, None
+        return None, None, soonest
+
+    def _run(self):
+        while True:
+            with self._cond:
+                engine, frame, wait = self._next_job()
+                while engine is None:
+                    self._cond.wait(timeout=wait if wait is not None else 0.5)
+                    engine, frame, wait = self._next_job()
+                self._busy.add(engine)
+
+            try:
+                if engine.is_running:
+                    engine.infer(frame)
+                else:
+                    frame.release()
+            except Exception as e:
+                print(f"Inference worker error: {e}")
+            finally:
+                with self._cond:
+                    self._busy.discard(engine)
+                    self._cond.notify_all()
+
+
+class EngineRegistry:
+    """Gesture engines, one per capture device, shared by every kiosk id on that device.
+
+    Kiosks are configured as "kiosk_id=device" pairs, e.g. from the
+    GESTURE_KIOSKS environment variable ("entrance=0,fitting-room=1"). A
+    numeric key is treated as a device index. 'default' is the kiosk on
+    camera 0, or the first configured kiosk if none uses camera 0, or camera
+    0 itself when nothing is configured; its engine is the only one that
+    drives the OS cursor. The rest use the null driver and their kiosk
+    browsers draw the cursor from /events.
+    """
+
+    def __init__(self, kiosks=None, pool=None, **engine_options):
+        kiosks = dict(kiosks or {})
+        if 'default' not in kiosks:
+            devices = list(kiosks.values())
+            kiosks = {'default': 0 if 0 in devices or not devices else devices[0], **kiosks}
+        self.kiosks = kiosks
+        self.pool = pool or InferencePool()
+        self.engine_options = engine_options
+        self._engines = {}  # device -> GestureEngine
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_kiosks(value):
+        kiosks = {}
+        for item in (value or '').split(','):
+            if '=' in item:
+                key, device = item.split('=', 1)
+                device = device.strip()
+                kiosks[key.strip()] = int(device) if device.isdigit() else device
+        return kiosks
+
+    def device_for(self, key):
+        if key in self.kiosks:
+            return self.kiosks[key]
+        if key.isdigit():
+            return int(key)
+        return None
+
+    def get(self, key='default'):
+        """The engine for a kiosk id or device index, created on first use. None if unknown."""
+        device = self.device_for(key)
+        if device is None:
+            return None
+        with self._lock:
+            # Kiosk ids and device indexes that name the same device share its engine
+            engine = self._engines.get(device)
+            if engine is None:
+                options = dict(self.engine_options)
+                options.setdefault('cursor', 'pyautogui' if device == self.kiosks['default'] else 'null')
+                engine = GestureEngine(source=device, inference_pool=self.pool, **options)
+                self._engines[device] = engine
+            return engine
+
+    def items(self):
+        """(kiosk_id, engine) for every kiosk whose engine exists, plus engines opened by bare device index."""
+        with self._lock:
+            engines = dict(self._engines)
+        items = [(key, engines[device]) for key, device in self.kiosks.items() if device in engines]
+        configured = set(self.kiosks.values())
+        items += [(str(device), engine) for device, engine in engines.items() if device not in configured]
+        return items
+
+    def stop_all(self):
+        with self._lock:
+            engines = list(self._engines.values())
+        for engine in engines:
+            engine.stop()
+
+
+# Global registry for shared use across requests
+registry = EngineRegistry(kiosks=EngineRegistry.parse_kiosks(os.getenv('GESTURE_KIOSKS')),
+                          inference_process=os.getenv('GESTURE_INFERENCE_PROCESS') == '1',
+                          detector=os.getenv('GESTURE_DETECTOR', 'hands'),
+                          idle_after=float(os.getenv('GESTURE_IDLE_AFTER', '5')) or None,
+                          gesture_model=os.getenv('GESTURE_MODEL') or None)
@@ -0,0 +1,175 @@
+"""
+Landmark and gesture event packets for /api/gestures/events
+
+Every inference result becomes one packet: the frame's capture timestamp,
+the landmarks of each hand and the gesture events it produced. Packets go
+out either as JSON (Server-Sent Events) or in a compact binary form.
+
+Binary packet layout (little endian), each prefixed by its uint32 length:
+    uint32  seq
+    float64 timestamp          capture time, seconds since the epoch
+    uint8   hand count
+    uint8   event count
+    per hand:
+        uint8    handedness    0 = left, 1 = right, 255 = unknown
+        float16  score
+        float16  landmarks[21][3]   x, y normalized to the frame, z depth
+    per event:
+        uint8    kind          see EVENT_CODES
+        float32  a, b          move: x, y  scroll: steps, 0  others: 0, 0
+
+Classifier 'gesture' events carry a label and are only sent as JSON.
+"""
+
+import collections
+import json
+import struct
+import threading
+import time
+
+import numpy as np
+
+EVENT_CODES = {'move': 1, 'click': 2, 'down': 3, 'up': 4, 'scroll': 5}
+HANDEDNESS_CODES = {'Left': 0, 'Right': 1}
+
+_HEADER = struct.Struct('<IdBB')
+_HAND = struct.Struct('<Be')
+_EVENT = struct.Struct('<Bff')
+_LENGTH = struct.Struct('<I')
+
+
+class GesturePacket:
+    """Landmarks and events from one inference result"""
+    __slots__ = ('seq', 'timestamp', 'points', 'handedness', 'scores', 'events')
+
+    def __init__(self, seq, timestamp, points, handedness, scores, events):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.points = points
+        self.handedness = handedness
+        self.scores = scores
+        self.events = events
+
+
+class GestureEventHub:
+    """Fans gesture packets out to stream subscribers.
+
+    Unlike frames, discrete events must not be skipped, so the hub keeps the
+    last `history` packets and a subscriber receives everything newer than
+    the last sequence it saw. One that falls further behind than the history
+    simply resumes from the oldest packet still kept. As on FrameHub,
+    listeners are called after every publish and on close.
+    """
+
+    def __init__(self, history=64):
+        self._cond = threading.Condition()
+        self._packets = collections.deque(maxlen=history)
+        self._seq = 0
+        self._closed = False
+        self._subscribers = 0
+        self._listeners = ()
+
+    @property
+    def subscribers(self):
+        return self._subscribers
+
+    def attach(self, last_seq=None):
+        """Add a subscriber and return the seq it should pass to wait_for.
+
+        A new subscriber starts at the newest packet, so it never receives
+        clicks and drags from before it connected. A client resuming a stream
+        passes the last seq it saw (the SSE Last-Event-ID) to get the kept
+        packets after it.
+        """
+        with self._cond:
+            self._subscribers += 1
+            if last_seq is None or last_seq > self._seq:
+                return self._seq
+            return last_seq
+
+    def detach(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def add_listener(self, callback):
+        with self._cond:
+            self._listeners = self._listeners + (callback,)
+
+    def remove_listener(self, callback):
+        with self._cond:
+            self._listeners = tuple(c for c in self._listeners if c != callback)
+
+    def publish(self, timestamp, hands, events):
+        """Record one inference result. Landmarks are copied: the detector reuses its buffers."""
+        with self._cond:
+            self._seq += 1
+            if hands is not None and len(hands):
+                packet = GesturePacket(self._seq, timestamp, hands.points.copy(),
+                                       list(hands.handedness), hands.scores.copy(), list(events))
+            else:
+                packet = GesturePacket(self._seq, timestamp, np.zeros((0, 21, 3), np.float32), [], [], list(events))
+            self._packets.append(packet)
+            self._cond.notify_all()
+        self._notify_listeners()
+
+    def wait_for(self, after_seq=0, timeout=None):
+        """Return every kept packet with seq > after_seq, waiting up to `timeout` for one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed and (not self._packets or self._packets[-1].seq <= after_seq):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            return [p for p in self._packets if p.seq > after_seq]
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._notify_listeners()
+
+    def _notify_listeners(self):
+        for callback in self._listeners:
+            callback()
+
+    def reopen(self):
+        with self._cond:
+            self._closed = False
+            self._packets.clear()
+
+
+def parse_last_event_id(value):
+    """The seq in a Last-Event-ID header, or None when absent or not a sequence number."""
+    value = (value or '').strip()
+    return int(value) if value.isdigit() else None
+
+
+def encode_json(packet):
+    return json.dumps({
+        'seq': packet.seq,
+        't': round(packet.timestamp, 4),
+        'hands': [
+            {
+                'handedness': packet.handedness[i],
+                'score': round(float(packet.scores[i]), 3),
+                'landmarks': np.round(packet.points[i].astype(np.float64), 4).reshape(-1).tolist(),
+            }
+            for i in range(len(packet.points))
+        ],
+        'events': [list(e) for e in packet.events],
+    }, separators=(',', ':'))
+
+
+def encode_binary(packet):
+    events = [event for event in packet.events if event[0] in EVENT_CODES]
+    parts = [_HEADER.pack(packet.seq, packet.timestamp, len(packet.points), len(events))]
+    for i in range(len(packet.points)):
+        parts.append(_HAND.pack(HANDEDNESS_CODES.get(packet.handedness[i], 255), float(packet.scores[i])))
+        parts.append(packet.points[i].astype('<f2').tobytes())
+    for event in events:
+        a = event[1] if len(event) > 1 else 0
+        b = event[2] if len(event) > 2 else 0
+        parts.append(_EVENT.pack(EVENT_CODES[event[0]], a, b))
+    body = b''.join(parts)
+    return _LENGTH.pack(len(body)) + body
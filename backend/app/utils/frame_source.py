@@ -0,0 +1,298 @@
+import glob
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameSource:
+    """Where the engine's capture stage gets its frames.
+
+    read() returns (success, image) like cv2.VideoCapture. Passing the image
+    from the previous read as `out` lets the source fill it in place instead
+    of allocating a new one. A finite source sets `exhausted` once it has
+    nothing more to give, so the capture stage can end instead of retrying;
+    open() starts it over.
+    """
+
+    def __init__(self, fps=30, realtime=True):
+        self.fps = fps
+        self.realtime = realtime
+        self.exhausted = False
+        self._next_time = None
+
+    def open(self):
+        return True
+
+    def read(self, out=None):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def _pace(self):
+        """In realtime mode, sleep so frames come out at self.fps."""
+        if not self.realtime or not self.fps:
+            return
+        now = time.monotonic()
+        if self._next_time is None or now - self._next_time > 1.0:
+            self._next_time = now
+        elif self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time += 1.0 / self.fps
+
+
+class CameraSource(FrameSource):
+    """A live camera through cv2.VideoCapture.
+
+    On open it asks for each capture format in `fourccs` in turn (compressed
+    MJPG first: raw YUYV often cannot do 30 fps at 640x480 over USB 2), a
+    driver queue of `buffer_size` frames and the target fps, then reads back
+    what the driver actually accepted into `settings`.
+
+    With `threaded` a grabber thread reads the camera continuously and read()
+    returns the newest frame, so frames never wait in the driver's queue while
+    a stage is busy. read() blocks until a frame newer than the last one it
+    returned arrives. The grabber thread owns its capture and releases it when
+    it exits, so a thread stuck in a read never finds its capture released.
+    """
+
+    def __init__(self, device=0, width=640, height=480, fps=30, fourccs=('MJPG', 'YUYV'),
+                 buffer_size=1, threaded=True, timeout=1.0):
+        super().__init__(fps=fps, realtime=False)  # the camera paces itself
+        self.device = device
+        self.width = width
+        self.height = height
+        self.fourccs = fourccs
+        self.buffer_size = buffer_size
+        self.threaded = threaded
+        self.timeout = timeout
+        self.cap = None
+        self.settings = {}
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = threading.Event()
+        self._latest = None
+        self._spare = None
+        self._seq = 0
+        self._read_seq = 0
+        self._failed = False
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.device)
+        if not self.cap.isOpened():
+            return False
+        self._negotiate()
+        print(f"Camera {self.device}: {self.settings}")
+
+        if self.threaded:
+            with self._cond:
+                self._latest = self._spare = None
+                self._seq = self._read_seq = 0
+                self._failed = False
+            # A fresh event per run: a grabber left over from the last run keeps its own, set one
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._grab_loop, args=(self.cap, self._stop), daemon=True,
+                                            name=f"camera-{self.device}")
+            self._thread.start()
+        return True
+
+    def _negotiate(self):
+        for fourcc in self.fourccs:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            if _fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC)) == fourcc:
+                break
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        self.settings = {
+            'fourcc': _fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC)),
+            'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': self.cap.get(cv2.CAP_PROP_FPS),
+            'buffer_size': int(self.cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+            'backend': self.cap.getBackendName(),
+            'threaded': self.threaded,
+        }
+
+    def _grab_loop(self, cap, stop):
+        """Read frames as fast as the camera delivers them, keeping only the newest. Releases cap on exit."""
+        try:
+            while True:
+                with self._cond:
+                    if stop.is_set():
+                        return
+                    spare = self._spare
+                success, img = cap.read(spare)
+                with self._cond:
+                    if stop.is_set():
+                        return  # released while reading: the frame belongs to no run
+                    if not success:
+                        # Let read() report the failure; the engine decides whether to reopen
+                        self._failed = True
+                        self._cond.notify_all()
+                        return
+                    # Swap buffers: the previous newest frame becomes the next read target
+                    self._spare, self._latest = self._latest, img
+                    self._seq += 1
+                    self._cond.notify_all()
+        finally:
+            cap.release()
+
+    def read(self, out=None):
+        if not self.threaded:
+            return self.cap.read(out)
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > self._read_seq or self._failed or self._stop.is_set(),
+                                self.timeout)
+            if self._seq <= self._read_seq:
+                return False, None
+            self._read_seq = self._seq
+            return True, _copy_into(self._latest, out)
+
+    def release(self):
+        if self._thread is not None:
+            with self._cond:
+                self._stop.set()
+                self._cond.notify_all()
+            # The grabber releases the capture once its current read returns, however long that takes
+            self._thread.join(timeout=self.timeout)
+            if self._thread.is_alive():
+                print(f"Camera {self.device}: grabber still reading, it releases the capture when done")
+            self._thread = None
+        elif self.cap:
+            self.cap.release()
+        self.cap = None
+
+
+def _fourcc_name(value):
+    code = int(value)
+    return ''.join(chr((code >> 8 * i) & 0xFF) for i in range(4))
+
+
+class VideoFileSource(FrameSource):
+    """Plays back a recorded video, at its own frame rate or as fast as possible"""
+
+    def __init__(self, path, realtime=True, loop=False):
+        super().__init__(realtime=realtime)
+        self.path = path
+        self.loop = loop
+        self.cap = None
+
+    def open(self):
+        self.exhausted = False
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        return True
+
+    def read(self, out=None):
+        self._pace()
+        success, img = self.cap.read(out)
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = self.cap.read(out)
+        if not success:
+            self.exhausted = True
+        return success, img
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+        self.cap = None
+
+
+class ImageSequenceSource(FrameSource):
+    """Plays back a directory or glob of images, preloaded so disk reads don't skew timings"""
+
+    def __init__(self, pattern, fps=30, realtime=True, loop=False):
+        super().__init__(fps=fps, realtime=realtime)
+        self.pattern = pattern
+        self.loop = loop
+        self.images = []
+        self.index = 0
+
+    def open(self):
+        pattern = os.path.join(self.pattern, '*') if os.path.isdir(self.pattern) else self.pattern
+        paths = sorted(glob.glob(pattern))
+        self.images = [img for img in (cv2.imread(p) for p in paths) if img is not None]
+        self.index = 0
+        self.exhausted = False
+        return bool(self.images)
+
+    def read(self, out=None):
+        self._pace()
+        if self.index >= len(self.images):
+            if not self.loop:
+                self.exhausted = True
+                return False, None
+            self.index = 0
+        img = self.images[self.index]
+        self.index += 1
+        # Hand out a copy, like a camera would: stages may write on the frame
+        return True, _copy_into(img, out)
+
+
+class SyntheticSource(FrameSource):
+    """Generated frames (moving gradient and blob) for benchmarks with no camera or recordings"""
+
+    def __init__(self, width=640, height=480, fps=30, realtime=True, frames=None, variants=16):
+        super().__init__(fps=fps, realtime=realtime)
+        self.width = width
+        self.height = height
+        self.frames = frames  # None = endless
+        self.variants = variants
+        self.count = 0
+        self._images = []
+
+    def open(self):
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 255, self.width, dtype=np.float32)
+        y = np.linspace(0, 255, self.height, dtype=np.float32)[:, None]
+        base = np.dstack([x + 0 * y, y + 0 * x, (x + y) / 2]).astype(np.uint8)
+        self._images = []
+        for i in range(self.variants):
+            img = cv2.add(base, rng.integers(0, 16, base.shape, dtype=np.uint8))
+            angle = 2 * np.pi * i / self.variants
+            center = (int(self.width * (0.5 + 0.3 * np.cos(angle))), int(self.height * (0.5 + 0.3 * np.sin(angle))))
+            cv2.circle(img, center, min(self.width, self.height) // 8, (60, 140, 220), -1)
+            self._images.append(img)
+        self.count = 0
+        self.exhausted = False
+        return True
+
+    def read(self, out=None):
+        self._pace()
+        if self.frames is not None and self.count >= self.frames:
+            self.exhausted = True
+            return False, None
+        img = self._images[self.count % self.variants]
+        self.count += 1
+        return True, _copy_into(img, out)
+
+
+def _copy_into(img, out):
+    """Copy img into out when it fits, like VideoCapture.read(out) does, else into a new array."""
+    if out is not None and out.shape == img.shape and out.dtype == img.dtype:
+        np.copyto(out, img)
+        return out
+    return img.copy()
+
+
+def make_source(spec, width=640, height=480, fps=30):
+    """Build a FrameSource from a device index, 'synthetic', a video path, or an image directory/glob."""
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec), width, height, fps)
+    if spec == 'synthetic':
+        return SyntheticSource(width, height, fps)
+    if os.path.isdir(spec) or any(ch in spec for ch in '*?['):
+        return ImageSequenceSource(spec, fps=fps)
+    return VideoFileSource(spec)
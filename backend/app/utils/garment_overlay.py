@@ -0,0 +1,223 @@
+import collections
+import os
+import threading
+import urllib.request
+
+import cv2
+import numpy as np
+from app.utils.pose_tracking import (LEFT_ANKLE, LEFT_HIP, LEFT_SHOULDER, RIGHT_ANKLE, RIGHT_HIP,
+                                     RIGHT_SHOULDER)
+
+# Where each clothing_type is pinned to the body: three (garment point, pose landmarks) pairs.
+# Garment points are fractions of a front-view product photo, where the wearer's right side
+# is on the image's left; landmark groups are averaged (e.g. mid-hip).
+ANCHORS = {
+    'upper': (((0.22, 0.12), (RIGHT_SHOULDER,)),
+              ((0.78, 0.12), (LEFT_SHOULDER,)),
+              ((0.50, 0.95), (LEFT_HIP, RIGHT_HIP))),
+    'lower': (((0.25, 0.04), (RIGHT_HIP,)),
+              ((0.75, 0.04), (LEFT_HIP,)),
+              ((0.50, 0.97), (LEFT_ANKLE, RIGHT_ANKLE))),
+    'full': (((0.22, 0.08), (RIGHT_SHOULDER,)),
+             ((0.78, 0.08), (LEFT_SHOULDER,)),
+             ((0.50, 0.97), (LEFT_ANKLE, RIGHT_ANKLE))),
+}
+
+# Lower garments are drawn first so tops cover the waistband
+DRAW_ORDER = ('lower', 'upper')
+
+
+def read_image(source, timeout=5):
+    """Decode an image file or http(s) URL to BGR, or BGRA when it has an alpha channel."""
+    if source.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(source, timeout=timeout) as response:
+            data = np.frombuffer(response.read(), dtype=np.uint8)
+    else:
+        data = np.fromfile(source, dtype=np.uint8)
+    img = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError(f"Could not decode image: {source}")
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    return img
+
+
+def border_mask(img, tolerance=30):
+    """Alpha mask for a garment photographed on a plain background.
+
+    The background colour is the median of the border pixels; everything of
+    that colour connected to the border is background, so garment areas of a
+    similar colour enclosed by the garment stay opaque.
+    """
+    border = np.concatenate([img[0], img[-1], img[:, 0], img[:, -1]])
+    background = np.median(border, axis=0)
+    distance = np.abs(img.astype(np.int16) - background.astype(np.int16)).max(axis=2)
+    mask = np.where(connected_to_corners(distance <= tolerance), 0, 255).astype(np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((5, 5), np.uint8))
+    return cv2.GaussianBlur(mask, (5, 5), 0)
+
+
+def connected_to_corners(region):
+    """The part of a boolean region reachable from the image corners (flood fill)."""
+    fill = np.where(region, 255, 0).astype(np.uint8)
+    h, w = fill.shape
+    flood = np.zeros((h + 2, w + 2), dtype=np.uint8)
+    for x, y in ((0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)):
+        if fill[y, x] == 255:
+            cv2.floodFill(fill, flood, (x, y), 128)
+    return fill == 128
+
+
+class GarmentAsset:
+    """A product image with its alpha, premultiplied and ready to warp"""
+
+    MAX_SIZE = 512  # longest side after loading; the warp never needs more on a 640x480 stream
+
+    def __init__(self, product_id, kind, image, alpha):
+        self.product_id = product_id
+        self.kind = kind if kind in ANCHORS else 'upper'
+        scale = self.MAX_SIZE / max(image.shape[:2])
+        if scale < 1:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            alpha = cv2.resize(alpha, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_AREA)
+        # Premultiplied BGRA: bilinear warping then never bleeds background colour into the edges
+        self.premultiplied = cv2.merge([*cv2.split(cv2.multiply(image, cv2.merge([alpha] * 3), scale=1 / 255)),
+                                        alpha])
+        self.height, self.width = image.shape[:2]
+        self.anchors = np.float32([(x * self.width, y * self.height) for (x, y), _ in ANCHORS[self.kind]])
+
+    @classmethod
+    def load(cls, product_id, kind, source, mask_path=None):
+        """Load from a file path or http(s) URL.
+
+        Alpha comes from the image's own alpha channel, else a precomputed
+        segmentation mask, else border_mask.
+        """
+        img = read_image(source)
+        if img.shape[2] == 4:
+            return cls(product_id, kind, np.ascontiguousarray(img[..., :3]), np.ascontiguousarray(img[..., 3]))
+
+        alpha = None
+        if mask_path and os.path.exists(mask_path):
+            alpha = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+            if alpha is not None and alpha.shape != img.shape[:2]:
+                alpha = cv2.resize(alpha, (img.shape[1], img.shape[0]), interpolation=cv2.INTER_LINEAR)
+        if alpha is None:
+            alpha = border_mask(img)
+        return cls(product_id, kind, img, alpha)
+
+
+class GarmentCompositor:
+    """Warps the selected garments onto the body and alpha-blends them into frames.
+
+    Each garment is pinned to three pose landmarks with an affine warp. The
+    warp's linear part (scale, rotation, shear) is quantized into pose buckets
+    and the warped asset is cached per product and bucket, so while someone
+    stands roughly still a frame only costs blending each garment's bounding
+    box; moving around only shifts where it is blended.
+    """
+
+    CACHE_SIZE = 64
+
+    def __init__(self, bucket_step=0.02, min_visibility=0.5):
+        self.bucket_step = bucket_step
+        self.min_visibility = min_visibility
+        self.hits = 0
+        self.misses = 0
+        self._garments = {}  # slot ('upper' / 'lower') -> GarmentAsset
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return bool(self._garments)
+
+    def select(self, slot, asset):
+        """Show `asset` in `slot`, or clear the slot with None."""
+        with self._lock:
+            garments = dict(self._garments)
+            if asset is None:
+                garments.pop(slot, None)
+            else:
+                garments[slot] = asset
+            self._garments = garments  # swapped whole so the render stage never sees a half update
+
+    def selection(self):
+        return {slot: asset.product_id for slot, asset in self._garments.items()}
+
+    def composite(self, img, pose):
+        """Blend every selected garment into img in place, for a (33, 4) pose from PoseDetector."""
+        garments = self._garments
+        h, w = img.shape[:2]
+        for slot in DRAW_ORDER:
+            asset = garments.get(slot)
+            if asset is None:
+                continue
+            placed = self._place(asset, pose, w, h)
+            if placed is not None:
+                self._blend(img, *placed)
+
+    def _place(self, asset, pose, w, h):
+        """The cached warp of asset for this pose and where its top-left corner lands in the frame."""
+        groups = [list(landmarks) for _, landmarks in ANCHORS[asset.kind]]
+        if min(pose[g, 3].min() for g in groups) < self.min_visibility:
+            return None
+        target = np.float32([pose[g, :2].mean(axis=0) * (w, h) for g in groups])
+        matrix = cv2.getAffineTransform(asset.anchors, target)
+
+        bucket = np.round(matrix[:, :2] / self.bucket_step).astype(int)
+        linear = bucket * self.bucket_step
+        if abs(np.linalg.det(linear)) < 1e-3:
+            return None
+        # Keyed on the asset object, not the product: re-selecting a product with a new image or
+        # mask loads a new asset. The entry holds the asset so its id is not reused meanwhile
+        key = (id(asset), tuple(bucket.ravel()))
+        cached = self._cache.get(key)
+        if cached is None:
+            warped = self._warp(asset, linear, w * h)
+            if warped is None:
+                return None
+            cached = self._cache[key] = (asset, *warped)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+            self.misses += 1
+        else:
+            self._cache.move_to_end(key)
+            self.hits += 1
+
+        # Translation that keeps the anchors' centroid exact under the quantized linear part
+        offset = target.mean(axis=0) - linear @ asset.anchors.mean(axis=0)
+        _, color, inverse_alpha, origin = cached
+        x, y = np.round(offset + origin).astype(int)
+        return color, inverse_alpha, x, y
+
+    def _warp(self, asset, linear, frame_area):
+        corners = np.float32([(0, 0), (asset.width, 0), (0, asset.height), (asset.width, asset.height)])
+        warped_corners = corners @ linear.T
+        origin = warped_corners.min(axis=0)
+        width, height = np.ceil(warped_corners.max(axis=0) - origin).astype(int)
+        if width <= 0 or height <= 0 or width * height > 4 * frame_area:
+            return None
+        matrix = np.hstack([linear, -origin[:, None]]).astype(np.float32)
+        warped = cv2.warpAffine(asset.premultiplied, matrix, (int(width), int(height)),
+                                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        color = np.ascontiguousarray(warped[..., :3])
+        inverse_alpha = cv2.merge([255 - warped[..., 3]] * 3)
+        return color, inverse_alpha, origin
+
+    @staticmethod
+    def _blend(img, color, inverse_alpha, x, y):
+        """img = color + img * (1 - alpha) over the overlapping box, in place."""
+        h, w = img.shape[:2]
+        gh, gw = color.shape[:2]
+        x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + gw, w), min(y + gh, h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        roi = img[y0:y1, x0:x1]
+        sx, sy = x0 - x, y0 - y
+        cv2.multiply(roi, inverse_alpha[sy:sy + y1 - y0, sx:sx + x1 - x0], dst=roi, scale=1 / 255)
+        cv2.add(roi, color[sy:sy + y1 - y0, sx:sx + x1 - x0], dst=roi)
+
+    def stats(self):
+        return {'selected': self.selection(), 'cache_hits': self.hits, 'cache_misses': self.misses,
+                'cached': len(self._cache)}
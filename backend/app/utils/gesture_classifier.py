@@ -0,0 +1,138 @@
+import numpy as np
+
+# Landmark indexes
+WRIST = 0
+MIDDLE_MCP = 9
+TIPS = (4, 8, 12, 16, 20)
+PIPS = (3, 6, 10, 14, 18)  # the thumb's IP joint stands in for a PIP
+_PAIRS = np.triu_indices(len(TIPS), k=1)
+
+
+def landmark_features(points, handedness=None, aspect=480 / 640):
+    """Feature rows for hand landmarks, computed for any number of hands at once.
+
+    points is (21, 3) or (N, 21, 3) in normalized frame coordinates;
+    handedness ('Left' / 'Right', one per hand) mirrors left hands so both
+    hands share a model. Landmarks are moved to the wrist and scaled by the
+    wrist to middle-knuckle distance, so features do not depend on where the
+    hand is or how far from the camera. Each row holds the 20 relative (x, y)
+    positions, the 10 fingertip-to-fingertip distances, and each finger's
+    extension (tip to wrist over PIP to wrist).
+    """
+    p = np.array(points, dtype=np.float32).reshape(-1, 21, 3)[..., :2]
+    p -= p[:, WRIST:WRIST + 1]
+    p[..., 1] *= aspect  # frame-width units in both axes
+    if handedness is not None:
+        left = np.array([h == 'Left' for h in np.atleast_1d(handedness)])
+        p[left, :, 0] *= -1
+    scale = np.linalg.norm(p[:, MIDDLE_MCP], axis=1)
+    p /= np.maximum(scale, 1e-6)[:, None, None]
+
+    tips = p[:, TIPS]
+    spread = np.linalg.norm(tips[:, _PAIRS[0]] - tips[:, _PAIRS[1]], axis=2)
+    extension = np.linalg.norm(tips, axis=2) / np.maximum(np.linalg.norm(p[:, PIPS], axis=2), 1e-6)
+    return np.concatenate([p[:, 1:].reshape(len(p), -1), spread, extension], axis=1)
+
+
+class GestureClassifier:
+    """Classifies hand poses against a library of recorded gestures.
+
+    A model is trained offline from labelled landmark samples (see
+    train_gestures.py) as either a nearest-centroid classifier or a one
+    hidden layer MLP over standardized landmark_features, and scores every
+    gesture in one vectorized pass. A hand that is far from every centroid
+    (centroid) or whose best class has less than min_confidence (mlp) is
+    classified as None. Adding a gesture is a matter of recording samples
+    for it and retraining.
+    """
+
+    def __init__(self, labels, mean, std, kind='centroid', params=None, reject=None, min_confidence=0.6,
+                 aspect=480 / 640):
+        self.labels = list(labels)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+        self.kind = kind
+        self.params = {name: np.asarray(value, dtype=np.float32) for name, value in (params or {}).items()}
+        self.reject = reject  # centroid: largest standardized distance still accepted
+        self.min_confidence = min_confidence
+        self.aspect = aspect
+
+    @classmethod
+    def train(cls, points, labels, handedness=None, kind='centroid', hidden=32, epochs=500, lr=0.05,
+              weight_decay=1e-4, seed=0, aspect=480 / 640):
+        """Fit a model to (N, 21, 3) landmark samples and their N labels."""
+        features = landmark_features(points, handedness, aspect)
+        names, y = np.unique(np.asarray(labels), return_inverse=True)
+        mean = features.mean(axis=0)
+        std = features.std(axis=0) + 1e-3
+        x = (features - mean) / std
+
+        if kind == 'centroid':
+            centroids = np.stack([x[y == c].mean(axis=0) for c in range(len(names))])
+            own = np.linalg.norm(x - centroids[y], axis=1)
+            # Accept up to a little past how far training samples sit from their own centroid
+            reject = float(np.percentile(own, 99) * 1.25)
+            return cls(names, mean, std, kind, {'centroids': centroids}, reject=reject, aspect=aspect)
+        if kind != 'mlp':
+            raise ValueError(f"Unknown classifier kind: {kind}")
+
+        rng = np.random.default_rng(seed)
+        w1 = rng.normal(0, np.sqrt(2 / x.shape[1]), (x.shape[1], hidden))
+        b1 = np.zeros(hidden)
+        w2 = rng.normal(0, np.sqrt(1 / hidden), (hidden, len(names)))
+        b2 = np.zeros(len(names))
+        onehot = np.eye(len(names))[y]
+        for _ in range(epochs):
+            # Full-batch gradient descent on softmax cross-entropy: sample sets are small
+            h = np.maximum(x @ w1 + b1, 0)
+            prob = _softmax(h @ w2 + b2)
+            grad = (prob - onehot) / len(x)
+            grad_h = (grad @ w2.T) * (h > 0)
+            w2 -= lr * (h.T @ grad + weight_decay * w2)
+            b2 -= lr * grad.sum(axis=0)
+            w1 -= lr * (x.T @ grad_h + weight_decay * w1)
+            b1 -= lr * grad_h.sum(axis=0)
+        return cls(names, mean, std, kind, {'w1': w1, 'b1': b1, 'w2': w2, 'b2': b2}, aspect=aspect)
+
+    def predict(self, points, handedness=None):
+        """Labels (None where rejected) and confidences for (N, 21, 3) landmarks."""
+        x = (landmark_features(points, handedness, self.aspect) - self.mean) / self.std
+        if self.kind == 'centroid':
+            distance = np.linalg.norm(x[:, None] - self.params['centroids'][None], axis=2)
+            best = distance.argmin(axis=1)
+            nearest = distance[np.arange(len(x)), best]
+            confidence = _softmax(-distance)[np.arange(len(x)), best]
+            accepted = nearest <= self.reject
+        else:
+            p = self.params
+            prob = _softmax(np.maximum(x @ p['w1'] + p['b1'], 0) @ p['w2'] + p['b2'])
+            best = prob.argmax(axis=1)
+            confidence = prob[np.arange(len(x)), best]
+            accepted = confidence >= self.min_confidence
+        labels = [self.labels[b] if ok else None for b, ok in zip(best, accepted)]
+        return labels, confidence
+
+    def classify(self, points, handedness=None):
+        """The gesture label of one hand's (21, 3) landmarks, or None."""
+        labels, _ = self.predict(points, None if handedness is None else [handedness])
+        return labels[0]
+
+    def save(self, path):
+        np.savez(path, labels=np.array(self.labels), mean=self.mean, std=self.std, kind=self.kind,
+                 reject=np.nan if self.reject is None else self.reject, min_confidence=self.min_confidence,
+                 aspect=self.aspect, **{f'param_{name}': value for name, value in self.params.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            params = {name[len('param_'):]: data[name] for name in data.files if name.startswith('param_')}
+            reject = float(data['reject'])
+            return cls(data['labels'].tolist(), data['mean'], data['std'], str(data['kind']), params,
+                       reject=None if np.isnan(reject) else reject,
+                       min_confidence=float(data['min_confidence']), aspect=float(data['aspect']))
+
+
+def _softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
@@ -1,102 +1,657 @@
 import cv2
 import numpy as np
 from app.utils.hand_tracking import HandDetector
+from app.utils.inference_process import ProcessHandDetector
+from app.utils.pose_tracking import PoseDetector
+from app.utils.holistic_tracking import HolisticDetector
+from app.utils.garment_overlay import GarmentCompositor
+from app.utils.pipeline import Frame, FramePool, LatestSlot
+from app.utils.stream_hub import StreamVariant, wait_for_viewers
+from app.utils.jpeg_codec import AdaptiveQuality, get_codec
+from app.utils.cursor_filter import CursorPredictor, OneEuroFilter
+from app.utils.gesture_state import DRAG, GestureStateMachine
+from app.utils.gesture_classifier import GestureClassifier
+from app.utils.event_stream import GestureEventHub
+from app.utils.cursor_driver import get_driver
+from app.utils.metrics import PipelineMetrics
+from app.utils.frame_source import make_source
+from app.utils.motion_gate import MotionGate
 import time
-import pyautogui
 import threading
 
+# Engine lifecycle states
+STOPPED = 'stopped'
+STARTING = 'starting'
+RUNNING = 'running'
+RECONNECTING = 'reconnecting'
+STOPPING = 'stopping'
+FAILED = 'failed'
+
 class GestureEngine:
-    def __init__(self):
-        self.cap = None
+    def __init__(self, codec='opencv', stream_fps=30, stream_kbps=None, stream_quality=80,
+                 inference_scale=1.0, inference_roi=False, inference_hz=15, capture_fps=30,
+                 cursor_filter=None, cursor='pyautogui', source=0, inference_pool=None,
+                 inference_process=False, reconnect_after=5, max_reconnects=None, detector='hands',
+                 idle_after=5.0, idle_inference_hz=2, idle_stream_fps=2, gesture_model=None):
+        # Camera index, 'synthetic', a video file, an image directory/glob, or a FrameSource
+        self.source_spec = source
+        self.source = None
         self.detector = None
-        self.is_running = False
-        self.thread = None
+        self.state = STOPPED
+        self.is_running = False  # stages run while this is set
+        self.threads = []
         self.lock = threading.Lock()
-        self.current_frame = None
-        
+
+        # Capture supervision: back off on read failures, reopen the source after
+        # reconnect_after in a row, give up after max_reconnects attempts (None = never)
+        self.reconnect_after = reconnect_after
+        self.max_reconnects = max_reconnects
+        self.backoff_base = 0.05
+        self.backoff_max = 5.0
+        self.join_timeout = 2.0
+        self._stop_event = threading.Event()
+        # Rate-limited stages sleep on this; it is notified on stop and when the engine wakes from idle
+        self._pace = threading.Condition()
+        # Stream variants by (overlay, width, fps, quality). The clean camera stream and the same
+        # frames with landmarks drawn always exist; others are made on request (stream_variant) and
+        # dropped after variant_ttl seconds without viewers. The dict is replaced whole on change
+        self.stream_demand = threading.Condition()
+        clean = StreamVariant(demand=self.stream_demand)
+        overlay = StreamVariant(overlay=True, demand=self.stream_demand)
+        self.variants = {clean.key: clean, overlay.key: overlay}
+        self.hub = clean.hub
+        self.overlay_hub = overlay.hub
+        self.variant_ttl = 30.0
+        self.max_variants = 8
+        self._variants_lock = threading.Lock()
+        self.events = GestureEventHub()
+        self.metrics = PipelineMetrics()
+
+        # Stage hand-off slots: each keeps only the newest frame. Captured images live in
+        # pooled buffers; the inference and encode slots give a buffer back when they drop a frame
+        self.frame_pool = FramePool()
+        self.infer_slot = LatestSlot(on_drop=Frame.release)
+        self.gesture_slot = LatestSlot()
+        self.encode_slot = LatestSlot(on_drop=Frame.release)
+        self._overlay = None  # reusable copy of the frame that stream overlays are drawn on
+        self._scaled = {}  # (overlay, width) -> reusable buffer for downscaled variants
+
+        # Stream encoding: only runs while a viewer is attached to the hub
+        self.codec = get_codec(codec)
+        self.stream_fps = stream_fps
+        self.quality = AdaptiveQuality(fps=stream_fps, target_kbps=stream_kbps, quality=stream_quality)
+
+        # Hand inference: optionally on a downscaled frame or a crop around the last hand,
+        # at its own rate (None = every captured frame) independent of the camera/stream rate
+        self.inference_scale = inference_scale
+        self.inference_roi = inference_roi
+        self.inference_hz = inference_hz
+        self.capture_fps = capture_fps
+        self.latest_hands = None
+        self.next_inference = 0  # monotonic time the next inference is allowed
+
+        # With a shared InferencePool the pool's workers run inference instead of a thread of our own
+        self.inference_pool = inference_pool
+        # Run MediaPipe in a child process fed through shared memory, off this process's GIL
+        self.inference_process = inference_process
+        # 'hands', or 'holistic' for pose and hands from one pass (always in-process)
+        self.detector_mode = detector
+
+        # Try-on: selected garments are warped onto the body in the overlay stream. In 'hands'
+        # mode a separate pose model only runs while a garment is selected
+        self.garments = GarmentCompositor()
+        self.pose_detector = None
+        self.latest_pose = None
+
+        # Idle mode: after idle_after seconds with no motion in the picture and no hand, inference
+        # and encoding drop to idle_inference_hz / idle_stream_fps; the first frame with motion
+        # or a hand brings back full rate. None disables the gate
+        self.motion = MotionGate(idle_after=idle_after) if idle_after is not None else None
+        self.idle_inference_hz = idle_inference_hz
+        self.idle_stream_fps = idle_stream_fps
+
+        # Cursor positions between inference results are extrapolated from landmark velocity
+        self.predictor = CursorPredictor(max_horizon=1.5 / (inference_hz or capture_fps))
+
+        # Speed-adaptive smoothing of the screen position, state kept per engine
+        self.cursor_filter = cursor_filter or OneEuroFilter(min_cutoff=1.0, beta=0.007)
+
         # Performance settings
         self.wCam, self.hCam = 640, 480
-        self.frameR = 100
-        self.smoothening = 5
-        self.plocX, self.plocY = 0, 0
-        self.wScr, self.hScr = pyautogui.size()
+        # Gesture thresholds are in normalized frame units so they hold at any inference resolution
+        self.frameR = (100 / 640, 100 / 480)  # active-area margin (x, y)
+        self.clickDist = 35 / 640  # index/middle tip distance for a click, as a fraction of frame width
+        # A trained GestureClassifier (train_gestures.py) replaces the landmark rules when given
+        classifier = GestureClassifier.load(gesture_model) if gesture_model else None
+        self.gestures = GestureStateMachine(click_dist=self.clickDist, aspect=self.hCam / self.wCam,
+                                            classifier=classifier)
+
+        # Cursor output backend: 'pyautogui', 'null' (headless) or 'recording', or a CursorDriver
+        self.cursor = get_driver(cursor)
+        self.wScr, self.hScr = self.cursor.screen_size()
+
+    def _set_state(self, state):
+        if state != self.state:
+            print(f"Gesture engine {self.source_spec}: {self.state} -> {state}")
+            self.state = state
 
     def start(self):
         with self.lock:
             if self.is_running:
                 return True
-            
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
+            # Join whatever is left of a run that ended on its own (failed or exhausted source)
+            self._shutdown()
+            self._set_state(STARTING)
+
+            self.source = make_source(self.source_spec, self.wCam, self.hCam, self.capture_fps)
+            if not self.source.open():
+                self.source.release()
+                self.source = None
+                self._set_state(FAILED)
                 return False
-            
-            self.cap.set(3, self.wCam)
-            self.cap.set(4, self.hCam)
-            
-            self.detector = HandDetector(detectionCon=0.7, trackCon=0.7)
+
+            # The model is loaded once and kept across restarts
+            if self.detector is None:
+                if self.detector_mode == 'holistic':
+                    self.detector = HolisticDetector(detectionCon=0.7, trackCon=0.7,
+                                                     inferenceScale=self.inference_scale)
+                else:
+                    detector_cls = ProcessHandDetector if self.inference_process else HandDetector
+                    self.detector = detector_cls(detectionCon=0.7, trackCon=0.7,
+                                                 inferenceScale=self.inference_scale, roi=self.inference_roi)
+                self.detector.metrics = self.metrics
+            self.detector.lastBox = None
+            self.metrics.reset()
+            self.frame_pool = FramePool()
+            for slot in (self.infer_slot, self.gesture_slot, self.encode_slot):
+                slot.reset()
+            for variant in self.variants.values():
+                variant.hub.reopen()
+            self.events.reopen()
+            self.latest_hands = None
+            self.latest_pose = None
+            self.predictor.reset()
+            self.cursor_filter.reset()
+            self.gestures.reset()
+            self.cursor.open()
+            self.next_inference = 0
+            if self.motion is not None:
+                self.motion.reset()
+            self._stop_event.clear()
             self.is_running = True
-            self.thread = threading.Thread(target=self._update, daemon=True)
-            self.thread.start()
+            stages = [self._capture_loop, self._gesture_loop, self._encode_loop]
+            if self.inference_pool is None:
+                stages.append(self._inference_loop)
+            else:
+                self.inference_pool.register(self)
+            self.threads = [
+                threading.Thread(target=stage, daemon=True, name=f"gesture-{stage.__name__.strip('_')}")
+                for stage in stages
+            ]
+            # Before the stages start, so a source that ends (or fails) at once is not marked running
+            self._set_state(RUNNING)
+            for thread in self.threads:
+                thread.start()
             return True
 
     def stop(self):
         with self.lock:
-            self.is_running = False
-            if self.cap:
-                self.cap.release()
-            self.cap = None
+            self._shutdown()
+
+    def _shutdown(self):
+        """Stop every stage, wait for the threads to exit, then release the source. Caller holds self.lock."""
+        if self.state == STOPPED and not self.threads:
+            return
+        self._set_state(STOPPING)
+        self._halt()
+        if self.inference_pool is not None:
+            self.inference_pool.unregister(self)
+        current = threading.current_thread()
+        for thread in self.threads:
+            if thread is not current:
+                thread.join(timeout=self.join_timeout)
+                if thread.is_alive():
+                    print(f"Gesture engine thread {thread.name} did not stop in time")
+        self.threads = []
+
+        # Only now is nothing reading from the source or the detector
+        if self.gestures.state == DRAG:
+            self.cursor.mouse_up()
+        self.cursor.close()
+        if self.source:
+            self.source.release()
+        self.source = None
+        if self.inference_process and self.detector is not None:
+            self.detector.close()  # frees the worker process; it restarts on the next frame
+        self._set_state(STOPPED)
 
-    def _update(self):
+    def _halt(self):
+        """Tell every stage to finish and wake any that are waiting."""
+        self.is_running = False
+        self._stop_event.set()
+        with self._pace:
+            self._pace.notify_all()
+        for slot in (self.infer_slot, self.gesture_slot, self.encode_slot):
+            slot.close()
+        for variant in self.variants.values():
+            variant.hub.close()
+        self.events.close()
+
+    def _capture_loop(self):
+        """Stage 1: grab and mirror frames as fast as the source delivers them.
+
+        A failed read backs off exponentially instead of retrying at once; after
+        reconnect_after failures in a row the source is reopened (see _reconnect).
+        """
+        pool = self.frame_pool
+        raw = None  # the source reads into the same image every frame
+        seq = 0
+        failures = 0
         while self.is_running:
-            success, img = self.cap.read()
+            source = self.source
+            with self.metrics.time('read'):
+                success, img = source.read(raw)
             if not success:
+                if source.exhausted:
+                    # A finished recording ends the run: every stage stops and start() can play it again
+                    print(f"Gesture source {self.source_spec} has no more frames")
+                    self._set_state(STOPPED)
+                    self._halt()
+                    break
+                self.metrics.count('read_failures')
+                failures += 1
+                if failures < self.reconnect_after:
+                    self._stop_event.wait(self._backoff(failures - 1))
+                elif self._reconnect():
+                    failures = 0
+                    raw = None
+                else:
+                    break
                 continue
-            
-            img = cv2.flip(img, 1)
-            
+            failures = 0
+            timestamp = time.time()
+            raw = img
+
+            if self.motion is not None:
+                with self.metrics.time('motion'):
+                    changed = self.motion.update(timestamp, raw)
+                if changed:
+                    self._mode_changed()
+
+            with self.metrics.time('flip'):
+                # Mirror straight into a pooled buffer, leased to the inference and encode stages
+                image, lease = pool.acquire(raw.shape, refs=2)
+                cv2.flip(raw, 1, dst=image)
+            seq += 1
+            frame = Frame(seq, timestamp, image, pool, lease)
+            self.metrics.tick('capture')
+            # The stream gets every frame; inference picks up the newest whenever it is ready
+            self.infer_slot.put(frame)
+            self.encode_slot.put(frame)
+            if self.inference_pool is not None:
+                self.inference_pool.notify()
+
+    @property
+    def idle(self):
+        return self.motion is not None and self.motion.idle
+
+    def _mode_changed(self):
+        """On waking from idle, let the next frame through inference and encoding without waiting."""
+        if self.motion.idle:
+            print(f"Gesture engine {self.source_spec}: idle")
+            return
+        print(f"Gesture engine {self.source_spec}: active")
+        self.metrics.count('wakeups')
+        self.next_inference = 0
+        for variant in self.variants.values():
+            variant.next_due = 0  # not the slot scheduled at the idle rate
+        with self._pace:
+            self._pace.notify_all()
+        if self.inference_pool is not None:
+            self.inference_pool.notify()
+
+    def _sleep(self, seconds):
+        """Pace a stage: sleep up to seconds, returning early on stop or when the engine wakes from idle."""
+        with self._pace:
+            self._pace.wait(seconds)
+
+    def _backoff(self, attempt):
+        return min(self.backoff_max, self.backoff_base * 2 ** attempt)
+
+    def _reconnect(self):
+        """Reopen the source with exponential backoff until it works.
+
+        Returns False if the engine is stopped meanwhile, or after max_reconnects
+        failed attempts, in which case the engine halts in the FAILED state.
+        """
+        self._set_state(RECONNECTING)
+        attempt = 0
+        while self.is_running:
+            self.source.release()
+            if self._stop_event.wait(self._backoff(attempt)):
+                return False
+            attempt += 1
+            self.metrics.count('reconnects')
+            print(f"Reopening gesture source {self.source_spec} (attempt {attempt})")
+            if self.source.open():
+                self._set_state(RUNNING)
+                return True
+            if self.max_reconnects is not None and attempt >= self.max_reconnects:
+                print(f"Gesture source {self.source_spec} did not come back after {attempt} attempts")
+                self._set_state(FAILED)
+                self._halt()
+                return False
+        return False
+
+    def _inference_loop(self):
+        """Stage 2: run hand tracking on the newest captured frame, at most inference_hz times a second."""
+        while self.is_running:
+            wait = self.next_inference - time.monotonic()
+            if wait > 0:
+                self._sleep(wait)
+
+            frame = self.infer_slot.get(timeout=0.5)
+            if frame is not None:
+                self.infer(frame)
+
+    def infer(self, frame):
+        """Run hand (and, for try-on, pose) tracking on one frame and hand the result to the gesture stage.
+
+        Called by the engine's own inference thread or by a shared InferencePool
+        worker; never concurrently for the same engine.
+        """
+        hz = self.idle_inference_hz if self.idle else self.inference_hz
+        if hz:
+            self.next_inference = time.monotonic() + 1.0 / hz
+        try:
+            if self.detector_mode == 'holistic':
+                found = self.detector.findAll(frame.image)
+                frame.landmarks = found.hands
+                self.latest_pose = found.pose
+            else:
+                frame.landmarks = self.detector.findHands(frame.image)
+            if self.garments.active and self.detector_mode != 'holistic':
+                if self.pose_detector is None:
+                    self.pose_detector = PoseDetector(inferenceScale=self.inference_scale)
+                    self.pose_detector.metrics = self.metrics
+                self.latest_pose = self.pose_detector.findPose(frame.image)
+        except Exception as e:
+            print(f"Engine inference error: {e}")
+            self.metrics.count('inference_errors')
+            frame.landmarks = None
+        finally:
+            frame.release()
+
+        self.metrics.tick('inference')
+        self.latest_hands = frame.landmarks
+        if self.motion is not None and frame.landmarks is not None and len(frame.landmarks):
+            # A hand holding still is still someone using the kiosk
+            if self.motion.activity(frame.timestamp):
+                self._mode_changed()
+        self.gesture_slot.put(frame)
+
+    def _gesture_loop(self):
+        """Stage 3: turn landmarks into cursor moves, clicks, drags and scrolls.
+
+        Runs on every inference result, and in between ticks at the capture rate
+        to keep moving the cursor along the predicted path.
+        """
+        tick = 1.0 / self.capture_fps
+        while self.is_running:
+            frame = self.gesture_slot.get(timeout=tick)
             try:
-                # Run hand tracking
-                lmList = self.detector.getPosition(img, indexes=range(21))
-                
-                if len(lmList) != 0:
-                    x1, y1 = lmList[8]  # Index finger tip
-                    index_up = lmList[8][1] < lmList[6][1]
-                    middle_up = lmList[12][1] < lmList[10][1]
-
-                    # Move Mouse
-                    if index_up and not middle_up:
-                        x3 = np.interp(x1, (self.frameR, self.wCam - self.frameR), (0, self.wScr))
-                        y3 = np.interp(y1, (self.frameR, self.hCam - self.frameR), (0, self.hScr))
-                        clocX = self.plocX + (x3 - self.plocX) / self.smoothening
-                        clocY = self.plocY + (y3 - self.plocY) / self.smoothening
-                        
-                        try:
-                            pyautogui.moveTo(clocX, clocY)
-                            self.plocX, self.plocY = clocX, clocY
-                        except:
-                            pass
-
-                    # Click
-                    elif index_up and middle_up:
-                        dist_bw = np.hypot(lmList[12][0] - x1, lmList[12][1] - y1)
-                        if dist_bw < 35: 
-                            try:
-                                pyautogui.click()
-                                time.sleep(0.2)
-                            except:
-                                pass
+                if frame is not None:
+                    self._handle_gesture(frame.timestamp, frame.landmarks)
+                    self.metrics.record('capture_to_cursor', time.time() - frame.timestamp)
+                elif self.gestures.moving:
+                    now = time.time()
+                    predicted = self.predictor.predict(now)
+                    if predicted is not None:
+                        self._move_cursor(now, *predicted)
             except Exception as e:
                 print(f"Engine update error: {e}")
+                self.metrics.count('gesture_errors')
 
-            # Encode frame for streaming
-            ret, buffer = cv2.imencode('.jpg', img)
-            if ret:
-                with self.lock:
-                    self.current_frame = buffer.tobytes()
+    def _handle_gesture(self, timestamp, hands):
+        points = hands.points[0] if hands is not None and len(hands) else None
+        handedness = hands.handedness[0] if points is not None else None
+        if points is None:
+            self.predictor.reset()
+            self.cursor_filter.reset()
 
-    def get_frame(self):
-        with self.lock:
-            return self.current_frame
+        with self.metrics.time('gesture'):
+            events = self.gestures.update(timestamp, points, handedness)
+            if self.events.subscribers:
+                self.events.publish(timestamp, hands, events)
+
+        for event in events:
+            kind = event[0]
+            if kind == 'move':
+                # Move to where the tip is predicted to be now, not when the frame was captured
+                self.predictor.observe(timestamp, event[1:])
+                now = time.time()
+                self._move_cursor(now, *self.predictor.predict(now))
+            elif kind == 'click':
+                self.cursor.click()
+            elif kind == 'down':
+                self.cursor.mouse_down()
+            elif kind == 'up':
+                self.cursor.mouse_up()
+            elif kind == 'scroll':
+                self.cursor.scroll(event[1])
+
+    def _move_cursor(self, timestamp, x1, y1):
+        """Move the OS cursor to the filtered screen position of a normalized index-tip position."""
+        x3 = np.interp(x1, (self.frameR[0], 1 - self.frameR[0]), (0, self.wScr))
+        y3 = np.interp(y1, (self.frameR[1], 1 - self.frameR[1]), (0, self.hScr))
+        clocX, clocY = self.cursor_filter(timestamp, (x3, y3))
+        with self.metrics.time('cursor'):
+            self.cursor.move_to(min(max(clocX, 0), self.wScr - 1), min(max(clocY, 0), self.hScr - 1))
+        self.metrics.tick('cursor')
+
+    def stream_variant(self, overlay=False, width=None, fps=None, quality=None):
+        """The hub for a stream variant (see StreamVariant), created on first use.
+
+        Requests are normalized so near-identical ones share a variant: width
+        is rounded down to a multiple of 16 and fps to a whole number, and
+        anything at or above the engine's own size or rate means None.
+        Returns None when max_variants are in use.
+        """
+        if width is not None:
+            width = max(64, int(width) // 16 * 16)
+            if width >= self.wCam:
+                width = None
+        if fps is not None:
+            fps = max(1, round(fps))
+            if fps >= self.stream_fps:
+                fps = None
+        if quality is not None:
+            quality = min(max(int(quality), 10), 95)
+        key = (overlay, width, fps, quality)
+
+        with self._variants_lock:
+            variant = self.variants.get(key)
+            if variant is None:
+                if len(self.variants) >= self.max_variants:
+                    self._prune_variants(ttl=1.0)
+                    if len(self.variants) >= self.max_variants:
+                        return None
+                variant = StreamVariant(overlay, width, fps, quality, demand=self.stream_demand)
+                self.variants = {**self.variants, key: variant}
+            variant.unused_since = time.monotonic()  # not pruned before the caller attaches
+            return variant.hub
+
+    def _prune_variants(self, ttl=None):
+        """Drop requested variants nobody has watched for ttl (variant_ttl) seconds. Caller holds _variants_lock."""
+        ttl = self.variant_ttl if ttl is None else ttl
+        now = time.monotonic()
+        keep = {}
+        for key, variant in self.variants.items():
+            if variant.hub.subscribers:
+                variant.unused_since = None
+            elif variant.unused_since is None:
+                variant.unused_since = now
+            if (variant.hub in (self.hub, self.overlay_hub) or variant.unused_since is None
+                    or now - variant.unused_since < ttl):
+                keep[key] = variant
+            else:
+                variant.hub.close()
+        if len(keep) != len(self.variants):
+            self.variants = keep
+
+    def _variant_hubs(self):
+        return [variant.hub for variant in self.variants.values()]
+
+    def _variant_interval(self, variant):
+        fps = min(variant.fps or self.stream_fps, self.stream_fps)
+        if self.idle:
+            fps = min(fps, self.idle_stream_fps)
+        return 1.0 / fps
+
+    def _encode_loop(self):
+        """Stage 4: JPEG-encode the newest frame for every stream variant that has viewers.
 
-# Global instance for shared use across requests
-engine = GestureEngine()
+        The clean stream is the camera image as captured. The overlay stream
+        has the selected garments and the latest landmarks drawn on a copy,
+        and is only rendered while someone watches it; clients can also draw
+        landmarks from /events. The loop runs at the rate of the fastest
+        watched variant and each variant gets a frame when its own fps is
+        due. While the engine is idle every variant drops to idle_stream_fps.
+        """
+        last_encode = 0
+        while self.is_running:
+            with self._variants_lock:
+                self._prune_variants()
+            widths = {variant.width for variant in self.variants.values()}
+            self._scaled = {key: buf for key, buf in self._scaled.items() if key[1] in widths}
+            if not wait_for_viewers(self._variant_hubs, self.stream_demand, timeout=0.5):
+                continue
+
+            frame = self.encode_slot.get(timeout=0.5)
+            if frame is None:
+                continue
+
+            watched = [variant for variant in self.variants.values() if variant.hub.subscribers]
+            interval = min((self._variant_interval(v) for v in watched), default=1.0 / self.stream_fps)
+            wait = last_encode + interval - time.monotonic()
+            if wait > 0:
+                # Too early for the fastest stream's fps: wait, then send whatever is newest by then
+                self._sleep(min(wait, interval))
+                newer = self.encode_slot.get(timeout=0)
+                if newer is not None:
+                    frame.release()
+                    frame = newer
+            now = last_encode = time.monotonic()
+
+            due = []
+            for variant in watched:
+                if variant.next_due <= now + interval / 2:
+                    variant_interval = self._variant_interval(variant)
+                    variant.next_due = max(variant.next_due, now - variant_interval / 2) + variant_interval
+                    due.append(variant)
+
+            hands = self.latest_hands
+            if hands is not None and not len(hands):
+                hands = None
+            pose = self.latest_pose if self.garments.active else None
+            try:
+                if due:
+                    self._render_variants(frame, due, hands, pose)
+            finally:
+                frame.release()
+            if due:
+                self.metrics.record('capture_to_stream', time.time() - frame.timestamp)
+                self.metrics.tick('stream')
+
+    def _render_variants(self, frame, variants, hands, pose):
+        """Publish frame to each variant, rendering, resizing and encoding every distinct image once."""
+        draw = hands is not None or pose is not None
+        images = {}  # (overlay, width) -> image
+        encoded = {}  # (overlay, width, quality) -> JPEG
+        for variant in variants:
+            # Nothing to draw: overlay viewers get the clean frame
+            overlay = variant.overlay and draw
+            size_key = (overlay, variant.width)
+            img = images.get(size_key)
+            if img is None:
+                full = images.get((overlay, None))
+                if full is None:
+                    full = images[(overlay, None)] = (self._render_overlay(frame.image, hands, pose) if overlay
+                                                      else frame.image)
+                img = images[size_key] = full if variant.width is None else self._resize(full, size_key)
+            key = (*size_key, variant.quality)
+            data = encoded.get(key)
+            if data is None:
+                data = encoded[key] = self._encode(img, variant.quality, adapt=variant.width is None)
+            self._publish(variant.hub, data, frame)
+
+    def _resize(self, img, size_key):
+        """Downscale img to a variant's width into a buffer reused across frames."""
+        width = size_key[1]
+        h, w = img.shape[:2]
+        shape = (max(2, round(h * width / w / 2) * 2), width, img.shape[2])
+        buf = self._scaled.get(size_key)
+        if buf is None or buf.shape != shape:
+            buf = self._scaled[size_key] = np.empty(shape, dtype=img.dtype)
+        with self.metrics.time('resize'):
+            cv2.resize(img, (shape[1], shape[0]), dst=buf, interpolation=cv2.INTER_AREA)
+        return buf
+
+    def _render_overlay(self, img, hands, pose):
+        """Draw garments and landmarks on a reused copy of img: the captured frame stays clean for every other stage."""
+        if self._overlay is None or self._overlay.shape != img.shape:
+            self._overlay = np.empty_like(img)
+        np.copyto(self._overlay, img)
+        if pose is not None:
+            with self.metrics.time('composite'):
+                self.garments.composite(self._overlay, pose)
+        if hands is not None:
+            with self.metrics.time('overlay'):
+                self.detector.drawHands(self._overlay, hands)
+        return self._overlay
+
+    def _encode(self, img, quality=None, adapt=True):
+        """JPEG at a fixed quality, or at the adaptive one when quality is None.
+
+        Only full-size adaptive encodes (adapt) feed the adaptive quality's
+        bitrate estimate.
+        """
+        with self.metrics.time('encode'):
+            data = self.codec.encode(img, quality or self.quality.quality)
+        if data and quality is None and adapt:
+            self.quality.update(len(data))
+        return data
+
+    def _publish(self, hub, data, frame):
+        if data:
+            hub.publish(data, frame.timestamp)
+
+    def get_metrics(self):
+        """Stage timings and rates plus the engine's own queue and stream state."""
+        data = self.metrics.snapshot()
+        data['is_running'] = self.is_running
+        data['state'] = self.state
+        data['dropped_frames'] = {
+            'inference': self.infer_slot.dropped,
+            'gesture': self.gesture_slot.dropped,
+            'encode': self.encode_slot.dropped,
+        }
+        data['frame_pool'] = {'size': self.frame_pool.size, 'misses': self.frame_pool.misses}
+        # What the camera actually agreed to (format, resolution, fps, queue length)
+        data['capture'] = getattr(self.source, 'settings', None)
+        data['stream'] = {
+            'subscribers': self.hub.subscribers,
+            'overlay_subscribers': self.overlay_hub.subscribers,
+            'variants': [variant.describe() for variant in self.variants.values()],
+            'event_subscribers': self.events.subscribers,
+            'quality': self.quality.quality,
+            'codec': self.codec.name,
+        }
+        data['garments'] = self.garments.stats()
+        # Current mode and time spent active and idle since start
+        data['motion'] = self.motion.snapshot(time.time()) if self.motion is not None else None
+        return data
+
+    def get_frame(self):
+        latest = self.hub.latest()
+        return latest.data if latest else None
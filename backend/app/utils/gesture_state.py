@@ -0,0 +1,162 @@
+import numpy as np
+
+# States
+IDLE = 'idle'
+MOVE = 'move'
+PINCH = 'pinch'
+CLICK = 'click'
+DRAG = 'drag'
+SCROLL = 'scroll'
+
+# Landmark indexes
+INDEX_PIP, INDEX_TIP = 6, 8
+MIDDLE_PIP, MIDDLE_TIP = 10, 12
+
+# Classifier labels that drive the cursor; any other label only raises ('gesture', label)
+POSE_ACTIONS = {'point': MOVE, 'pinch': PINCH, 'two': SCROLL}
+
+
+class GestureStateMachine:
+    """Turns a stream of hand landmarks into cursor events without ever sleeping.
+
+    Feed it `update(t, points)` with the (21, 3) normalized landmarks of one
+    hand (or None when no hand is visible). It returns a list of events:
+
+        ('move', x, y)   index tip position while moving or dragging
+        ('click',)       pinch released before drag_delay
+        ('down',)        pinch held for drag_delay: drag starts
+        ('up',)          drag released
+        ('scroll', n)    two fingers up and apart, moved vertically
+        ('gesture', l)   a classifier gesture was held (only with a classifier)
+
+    Poses:
+        index up only                   -> MOVE
+        index + middle up, tips close   -> PINCH (click on release, DRAG if held)
+        index + middle up, tips apart   -> SCROLL
+        anything else / no hand         -> IDLE
+
+    With a GestureClassifier the pose comes from the model instead of these
+    rules: `actions` maps its labels to the poses above (POSE_ACTIONS by
+    default), and any other label it recognizes is reported as a 'gesture'
+    event once it has been held for `debounce`.
+
+    All debouncing is by timestamp: a new pose must be held for `debounce`
+    seconds before it takes effect, and clicks are at least `click_cooldown`
+    seconds apart.
+    """
+
+    def __init__(self, click_dist=35 / 640, aspect=480 / 640, debounce=0.05, drag_delay=0.4,
+                 click_cooldown=0.3, scroll_gain=60, release_ratio=1.3, classifier=None, actions=None):
+        self.click_dist = click_dist
+        self.aspect = aspect  # frame height / width, so distances are in frame-width units
+        self.debounce = debounce
+        self.drag_delay = drag_delay
+        self.click_cooldown = click_cooldown
+        self.scroll_gain = scroll_gain  # scroll steps per frame height of hand travel
+        self.release_ratio = release_ratio  # pinch hysteresis: release only once tips are this much further apart
+        self.classifier = classifier
+        self.actions = POSE_ACTIONS if actions is None else actions
+        self.reset()
+
+    def reset(self):
+        self.state = IDLE
+        self.state_since = None
+        self.pose = IDLE
+        self.candidate = None  # no pose seen yet: the first update always starts the debounce
+        self.candidate_since = None
+        self.last_click = -np.inf
+        self.scroll_y = None
+        self.scroll_accum = 0.0
+        self.label = None  # classifier label of the latest hand
+        self.label_candidate = None
+        self.label_since = None
+        self.label_reported = None
+
+    def _pose(self, points, handedness=None):
+        if points is None:
+            self.label = None
+            return IDLE
+        if self.classifier is not None:
+            self.label = self.classifier.classify(points, handedness)
+            return self.actions.get(self.label, IDLE)
+        index_up = points[INDEX_TIP, 1] < points[INDEX_PIP, 1]
+        middle_up = points[MIDDLE_TIP, 1] < points[MIDDLE_PIP, 1]
+        if index_up and not middle_up:
+            return MOVE
+        if index_up and middle_up:
+            dx, dy = points[MIDDLE_TIP, :2] - points[INDEX_TIP, :2]
+            dist = np.hypot(dx, dy * self.aspect)
+            pinched = self.state in (PINCH, DRAG)
+            limit = self.click_dist * (self.release_ratio if pinched else 1.0)
+            return PINCH if dist < limit else SCROLL
+        return IDLE
+
+    def _enter(self, t, state):
+        self.state = state
+        self.state_since = t
+        if state == SCROLL:
+            self.scroll_y = None
+            self.scroll_accum = 0.0
+
+    def update(self, t, points, handedness=None):
+        events = []
+        pose = self.pose = self._pose(points, handedness)
+        if self.classifier is not None:
+            self._update_label(t, events)
+
+        # Debounce: a pose has to persist before the machine acts on it
+        if pose != self.candidate:
+            self.candidate, self.candidate_since = pose, t
+        target = pose if t - self.candidate_since >= self.debounce else self.state
+        if self.state == CLICK:
+            # Hold off new pinches until the click cooldown has passed
+            target = CLICK if t - self.last_click < self.click_cooldown else pose
+        elif self.state == DRAG and target == PINCH:
+            target = DRAG
+
+        if target != self.state:
+            if self.state == DRAG:
+                events.append(('up',))
+            elif self.state == PINCH:
+                # Pinch released before drag_delay: that was a click
+                events.append(('click',))
+                self.last_click = t
+                target = CLICK
+            self._enter(t, target)
+
+        if self.state == PINCH and t - self.state_since >= self.drag_delay:
+            events.append(('down',))
+            self._enter(t, DRAG)
+
+        if self.moving:
+            events.append(('move', float(points[INDEX_TIP, 0]), float(points[INDEX_TIP, 1])))
+        elif self.state == SCROLL and pose == SCROLL:
+            y = float((points[INDEX_TIP, 1] + points[MIDDLE_TIP, 1]) / 2)
+            if self.scroll_y is not None:
+                # Hand moving up scrolls up (positive), like pyautogui.scroll
+                self.scroll_accum += (self.scroll_y - y) * self.scroll_gain
+                steps = int(self.scroll_accum)
+                if steps:
+                    events.append(('scroll', steps))
+                    self.scroll_accum -= steps
+            self.scroll_y = y
+
+        return events
+
+    def _update_label(self, t, events):
+        """Report a classifier gesture without a cursor action once it has been held for debounce."""
+        if self.label != self.label_candidate or self.label_since is None:
+            self.label_candidate, self.label_since = self.label, t
+        if t - self.label_since < self.debounce or self.label == self.label_reported:
+            return
+        self.label_reported = self.label
+        if self.label is not None and self.label not in self.actions:
+            events.append(('gesture', self.label))
+
+    @property
+    def moving(self):
+        """True while the cursor should follow the index tip."""
+        if self.state == DRAG:
+            return self.pose != IDLE
+        return self.pose == MOVE and self.state in (MOVE, CLICK)
+
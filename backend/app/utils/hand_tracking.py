@@ -1,14 +1,44 @@
 import cv2
 import mediapipe as mp
+import numpy as np
+from app.utils.metrics import timed
+
+
+class HandResults:
+    """Every hand found in one frame.
+
+    points is a (hands, 21, 3) float32 array: x and y normalized to the full
+    frame, z is MediaPipe's relative depth. It is a view into a buffer owned by
+    the detector and is reused a few calls later, so copy it to keep it longer.
+    """
+
+    def __init__(self, points, handedness, scores):
+        self.points = points
+        self.handedness = handedness  # 'Left' / 'Right' per hand
+        self.scores = scores  # detection confidence per hand
+
+    def __len__(self):
+        return len(self.points)
+
 
 class HandDetector:
-    def __init__(self, mode=False, maxHands=2, modelComplexity=1, detectionCon=0.5, trackCon=0.5):
+    # Result buffers are recycled round-robin; a result stays valid for this many calls
+    RESULT_BUFFERS = 4
+
+    def __init__(self, mode=False, maxHands=2, modelComplexity=1, detectionCon=0.5, trackCon=0.5,
+                 inferenceScale=1.0, roi=False, roiMargin=0.5):
         self.mode = mode
         self.maxHands = maxHands
         self.modelComplexity = modelComplexity
         self.detectionCon = detectionCon
         self.trackCon = trackCon
 
+        # Reduced-cost inference: downscale the frame and/or crop around the last hand
+        self.inferenceScale = inferenceScale
+        self.roi = roi
+        self.roiMargin = roiMargin
+        self.lastBox = None  # (x0, y0, x1, y1) of the last hand, normalized to the full frame
+
         self.mpHands = mp.solutions.hands
         self.hands = self.mpHands.Hands(
             static_image_mode=self.mode,
@@ -17,20 +47,112 @@ class HandDetector:
             min_detection_confidence=self.detectionCon,
             min_tracking_confidence=self.trackCon
         )
-        self.mpDraw = mp.solutions.drawing_utils
-
-    def getPosition(self, img, indexes=range(21), hand_no=0, draw=True):
-        lst = []
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(imgRGB)
-        if results.multi_hand_landmarks:
-            if len(results.multi_hand_landmarks) >= hand_no + 1:
-                myHand = results.multi_hand_landmarks[hand_no]
-                for id, lm in enumerate(myHand.landmark):
-                    if id in indexes:
-                        h, w, c = img.shape
-                        x, y = int(lm.x * w), int(lm.y * h)
-                        lst.append((x, y))
-                if draw:
-                    self.mpDraw.draw_landmarks(img, myHand, self.mpHands.HAND_CONNECTIONS)
-        return lst
+
+        self._points = np.zeros((self.RESULT_BUFFERS, self.maxHands, 21, 3), dtype=np.float32)
+        self._scores = np.zeros((self.RESULT_BUFFERS, self.maxHands), dtype=np.float32)
+        self._bufferIdx = 0
+        self._scratch = {}  # reusable resize / RGB conversion outputs, keyed by name
+
+        # Optional PipelineMetrics: times color conversion and inference when set
+        self.metrics = None
+
+    def _inferenceRegion(self, img):
+        """Pick the image MediaPipe sees and the full-frame pixel box it covers."""
+        h, w = img.shape[:2]
+        if self.roi and self.lastBox is not None:
+            x0, y0, x1, y1 = self.lastBox
+            # Grow the box by the margin on every side and make it square in pixels
+            side = max((x1 - x0) * w, (y1 - y0) * h) * (1 + 2 * self.roiMargin)
+            cx, cy = (x0 + x1) / 2 * w, (y0 + y1) / 2 * h
+            left, top = int(max(0, cx - side / 2)), int(max(0, cy - side / 2))
+            right, bottom = int(min(w, cx + side / 2)), int(min(h, cy + side / 2))
+            if right - left > 16 and bottom - top > 16:
+                return img[top:bottom, left:right], (left, top, right - left, bottom - top)
+
+        if self.inferenceScale != 1.0:
+            size = (max(1, round(w * self.inferenceScale)), max(1, round(h * self.inferenceScale)))
+            small = cv2.resize(img, size, dst=self._scratchBuffer('small', (size[1], size[0], 3)),
+                               interpolation=cv2.INTER_AREA)
+            return small, (0, 0, w, h)
+        return img, (0, 0, w, h)
+
+    def _scratchBuffer(self, name, shape):
+        """A uint8 image of `shape` reused across frames, reallocated only when the shape changes."""
+        buf = self._scratch.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._scratch[name] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def findHands(self, img, draw=False):
+        """Run inference once and return a HandResults for every detected hand."""
+        h, w = img.shape[:2]
+        region, (left, top, rw, rh) = self._inferenceRegion(img)
+        with timed(self.metrics, 'color_convert'):
+            imgRGB = cv2.cvtColor(region, cv2.COLOR_BGR2RGB, dst=self._scratchBuffer('rgb', region.shape))
+        with timed(self.metrics, 'inference'):
+            results = self.hands.process(imgRGB)
+
+        idx = self._bufferIdx
+        self._bufferIdx = (idx + 1) % self.RESULT_BUFFERS
+        found = results.multi_hand_landmarks or []
+        n = min(len(found), self.maxHands)
+        points = self._points[idx, :n]
+        scores = self._scores[idx, :n]
+        handedness = []
+
+        for i in range(n):
+            points[i].reshape(-1)[:] = np.fromiter(
+                (v for lm in found[i].landmark for v in (lm.x, lm.y, lm.z)), dtype=np.float32, count=63)
+            if results.multi_handedness:
+                label = results.multi_handedness[i].classification[0]
+                handedness.append(label.label)
+                scores[i] = label.score
+            else:
+                handedness.append(None)
+                scores[i] = 0
+
+        if n:
+            # Map every landmark from the inference region back to the full frame in one pass
+            points[..., 0] = (left + points[..., 0] * rw) / w
+            points[..., 1] = (top + points[..., 1] * rh) / h
+            xy = points[0, :, :2]
+            self.lastBox = (*xy.min(axis=0), *xy.max(axis=0))
+            if draw:
+                self.drawHands(img, HandResults(points, handedness, scores))
+        else:
+            self.lastBox = None
+
+        return HandResults(points, handedness, scores)
+
+    def getPosition(self, img, indexes=range(21), hand_no=0, draw=False, normalized=False):
+        """Landmarks of one hand in full-frame pixels, or 0..1 floats with normalized=True.
+
+        Leaves img untouched unless draw=True; use drawHands on a copy to render an overlay.
+        """
+        hands = self.findHands(img, draw=draw)
+        if len(hands) < hand_no + 1:
+            return []
+        h, w = img.shape[:2]
+        xy = hands.points[hand_no, list(indexes), :2]
+        if normalized:
+            return [tuple(p) for p in xy.tolist()]
+        return [tuple(p) for p in (xy * (w, h)).astype(int).tolist()]
+
+    def drawHands(self, img, hands):
+        """Draw landmarks from a HandResults onto img, which may be a different frame of the same size."""
+        draw_hands(img, hands)
+
+    def close(self):
+        """Release the MediaPipe graph."""
+        self.hands.close()
+
+
+def draw_hands(img, hands):
+    """Draw every hand of a HandResults onto img as MediaPipe-style connections and joints."""
+    h, w = img.shape[:2]
+    for hand in hands.points:
+        pixels = [(int(x * w), int(y * h)) for x, y in hand[:, :2]]
+        for start, end in mp.solutions.hands.HAND_CONNECTIONS:
+            cv2.line(img, pixels[start], pixels[end], (224, 224, 224), 2)
+        for px in pixels:
+            cv2.circle(img, px, 3, (0, 0, 255), cv2.FILLED)
@@ -0,0 +1,115 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+from app.utils.hand_tracking import HandResults, draw_hands
+from app.utils.metrics import timed
+
+
+class FrameLandmarks:
+    """Everything one inference pass found in a frame.
+
+    hands is a HandResults; pose is a (33, 4) float32 array of x, y (normalized
+    to the frame), z and visibility, or None when no body was found.
+    """
+
+    def __init__(self, hands, pose):
+        self.hands = hands
+        self.pose = pose
+
+
+class HolisticDetector:
+    """Body and hand landmarks from a single MediaPipe Holistic pass.
+
+    Holistic tracks the body and crops each hand model's input around the
+    pose wrists, so pose and both hands cost one graph run instead of a full
+    Hands model plus a Pose model per frame. findAll returns both; findHands
+    and drawHands keep the HandDetector interface for code that only needs
+    hands. Like HandDetector, results are views into recycled buffers that
+    stay valid for RESULT_BUFFERS calls.
+    """
+
+    RESULT_BUFFERS = 4
+
+    def __init__(self, modelComplexity=1, detectionCon=0.5, trackCon=0.5, inferenceScale=1.0):
+        self.modelComplexity = modelComplexity
+        self.detectionCon = detectionCon
+        self.trackCon = trackCon
+        self.inferenceScale = inferenceScale
+        self.lastBox = None  # (x0, y0, x1, y1) of the first hand, normalized to the full frame
+
+        self.holistic = mp.solutions.holistic.Holistic(
+            static_image_mode=False,
+            model_complexity=self.modelComplexity,
+            smooth_landmarks=True,
+            min_detection_confidence=self.detectionCon,
+            min_tracking_confidence=self.trackCon
+        )
+
+        self._hands = np.zeros((self.RESULT_BUFFERS, 2, 21, 3), dtype=np.float32)
+        self._scores = np.ones((self.RESULT_BUFFERS, 2), dtype=np.float32)  # Holistic gives no hand score
+        self._pose = np.zeros((self.RESULT_BUFFERS, 33, 4), dtype=np.float32)
+        self._bufferIdx = 0
+        self._scratch = {}
+
+        # Optional PipelineMetrics: times color conversion and inference when set
+        self.metrics = None
+
+    def _scratchBuffer(self, name, shape):
+        buf = self._scratch.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._scratch[name] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def findAll(self, img):
+        """Run inference once and return a FrameLandmarks with pose and hands."""
+        h, w = img.shape[:2]
+        if self.inferenceScale != 1.0:
+            size = (max(1, round(w * self.inferenceScale)), max(1, round(h * self.inferenceScale)))
+            img = cv2.resize(img, size, dst=self._scratchBuffer('small', (size[1], size[0], 3)),
+                             interpolation=cv2.INTER_AREA)
+        with timed(self.metrics, 'color_convert'):
+            imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._scratchBuffer('rgb', img.shape))
+        with timed(self.metrics, 'inference'):
+            results = self.holistic.process(imgRGB)
+
+        idx = self._bufferIdx
+        self._bufferIdx = (idx + 1) % self.RESULT_BUFFERS
+
+        # Holistic labels hands anatomically, but the engine feeds mirrored frames, so its left
+        # hand is what HandDetector reports as 'Right' (and vice versa). 'Right' first: engine
+        # gestures follow hand 0, and most users point with their right
+        found = [(label, hand) for label, hand in (('Right', results.left_hand_landmarks),
+                                                   ('Left', results.right_hand_landmarks)) if hand]
+        points = self._hands[idx, :len(found)]
+        for i, (_, hand) in enumerate(found):
+            points[i].reshape(-1)[:] = np.fromiter(
+                (v for lm in hand.landmark for v in (lm.x, lm.y, lm.z)), dtype=np.float32, count=63)
+        hands = HandResults(points, [label for label, _ in found], self._scores[idx, :len(found)])
+        if found:
+            xy = points[0, :, :2]
+            self.lastBox = (*xy.min(axis=0), *xy.max(axis=0))
+        else:
+            self.lastBox = None
+
+        pose = None
+        if results.pose_landmarks:
+            pose = self._pose[idx]
+            pose.reshape(-1)[:] = np.fromiter(
+                (v for lm in results.pose_landmarks.landmark for v in (lm.x, lm.y, lm.z, lm.visibility)),
+                dtype=np.float32, count=33 * 4)
+        return FrameLandmarks(hands, pose)
+
+    def findHands(self, img, draw=False):
+        """Hands only, as HandDetector.findHands (the pose is still computed by the shared pass)."""
+        hands = self.findAll(img).hands
+        if draw and len(hands):
+            self.drawHands(img, hands)
+        return hands
+
+    def drawHands(self, img, hands):
+        """Draw landmarks from a HandResults onto img, which may be a different frame of the same size."""
+        draw_hands(img, hands)
+
+    def close(self):
+        """Release the MediaPipe graph."""
+        self.holistic.close()
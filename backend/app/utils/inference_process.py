@@ -0,0 +1,172 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from app.utils.hand_tracking import HandDetector, HandResults, draw_hands
+
+
+def _worker(conn, shm_name, shape, options):
+    """Child process: run a HandDetector on frames the parent writes into shared memory.
+
+    Sends True once the detector is built (or the error if it could not be),
+    then receives (slot) indexes over the pipe and answers with the landmarks
+    as raw float32 bytes, so neither side ever pickles an image.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        detector = HandDetector(**options)
+    except Exception as e:
+        conn.send(str(e))
+        del frames
+        shm.close()
+        return
+    conn.send(True)
+    try:
+        while True:
+            slot = conn.recv()
+            if slot is None:
+                break
+            try:
+                start = time.perf_counter()
+                hands = detector.findHands(frames[slot])
+                conn.send((hands.points.tobytes(), hands.handedness, hands.scores.tobytes(),
+                           time.perf_counter() - start))
+            except Exception as e:
+                conn.send(str(e))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        detector.close()
+        del frames
+        shm.close()
+
+
+class ProcessHandDetector:
+    """A HandDetector running in its own process, so inference never holds this process's GIL.
+
+    Frames are copied once into a ring of shared-memory slots and only the
+    slot index crosses the pipe; the (hands, 21, 3) landmark array comes back
+    as raw bytes. Exposes the same findHands/drawHands/close interface as
+    HandDetector, so the engine can use either. The worker is started on the
+    first frame and restarted if the frame size changes or the worker dies.
+    Starting it (spawning, importing mediapipe, building the graph) may take
+    up to startup_timeout; each frame after that gets timeout.
+    """
+
+    # Frames in flight never exceed one, but a slot is not rewritten until the
+    # ring comes back round, so a worker that timed out never reads a torn frame
+    SLOTS = 3
+    RESULT_BUFFERS = HandDetector.RESULT_BUFFERS
+
+    def __init__(self, timeout=2.0, startup_timeout=60.0, start_method='spawn', **options):
+        self.options = options
+        self.maxHands = options.get('maxHands', 2)
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.context = multiprocessing.get_context(start_method)
+        self.lastBox = None  # kept for interface parity; the worker tracks its own ROI
+
+        self._process = None
+        self._conn = None
+        self._shm = None
+        self._frames = None
+        self._slot = 0
+
+        self._points = np.zeros((self.RESULT_BUFFERS, self.maxHands, 21, 3), dtype=np.float32)
+        self._scores = np.zeros((self.RESULT_BUFFERS, self.maxHands), dtype=np.float32)
+        self._bufferIdx = 0
+
+        # Optional PipelineMetrics: times the frame copy, worker inference and the round trip
+        self.metrics = None
+
+    def _startWorker(self, shape):
+        self.close()
+        shape = (self.SLOTS, *shape)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self._frames = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._conn, child = self.context.Pipe()
+        self._process = self.context.Process(
+            target=_worker, args=(child, self._shm.name, shape, self.options),
+            daemon=True, name='hand-inference')
+        self._process.start()
+        child.close()
+
+        # Wait for the detector to be built, so the first frame's timeout only covers inference
+        try:
+            ready = self._conn.recv() if self._conn.poll(self.startup_timeout) else None
+        except EOFError:
+            ready = 'exited while starting'
+        if ready is not True:
+            self.close()
+            reason = ready if isinstance(ready, str) else f'not ready after {self.startup_timeout}s'
+            raise RuntimeError(f'Hand inference worker did not start: {reason}')
+
+    def findHands(self, img, draw=False):
+        """Run inference once in the worker and return a HandResults for every detected hand."""
+        if self._frames is None or self._frames.shape[1:] != img.shape or not self._process.is_alive():
+            self._startWorker(img.shape)
+
+        start = time.perf_counter()
+        slot = self._slot
+        self._slot = (slot + 1) % self.SLOTS
+        np.copyto(self._frames[slot], img)
+        copied = time.perf_counter()
+        self._conn.send(slot)
+        if not self._conn.poll(self.timeout):
+            # A stuck worker would block every later frame: replace it
+            self._startWorker(img.shape)
+            raise RuntimeError('Hand inference worker timed out')
+        reply = self._conn.recv()
+        if isinstance(reply, str):
+            raise RuntimeError(f'Hand inference worker error: {reply}')
+        points_bytes, handedness, scores_bytes, seconds = reply
+
+        if self.metrics is not None:
+            self.metrics.record('shm_copy', copied - start)
+            self.metrics.record('inference', seconds)
+            self.metrics.record('ipc', time.perf_counter() - copied - seconds)
+
+        idx = self._bufferIdx
+        self._bufferIdx = (idx + 1) % self.RESULT_BUFFERS
+        n = len(handedness)
+        points = self._points[idx, :n]
+        scores = self._scores[idx, :n]
+        points.reshape(-1)[:] = np.frombuffer(points_bytes, dtype=np.float32)
+        scores[:] = np.frombuffer(scores_bytes, dtype=np.float32)
+        hands = HandResults(points, handedness, scores)
+
+        if n:
+            xy = points[0, :, :2]
+            self.lastBox = (*xy.min(axis=0), *xy.max(axis=0))
+            if draw:
+                self.drawHands(img, hands)
+        else:
+            self.lastBox = None
+        return hands
+
+    def drawHands(self, img, hands):
+        """Draw landmarks from a HandResults onto img, which may be a different frame of the same size."""
+        draw_hands(img, hands)
+
+    def close(self):
+        """Stop the worker and free the shared memory."""
+        if self._process is not None:
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=1.0)
+            self._conn.close()
+        if self._shm is not None:
+            self._frames = None
+            self._shm.close()
+            self._shm.unlink()
+        self._process = None
+        self._conn = None
+        self._shm = None
+        self._frames = None
@@ -0,0 +1,78 @@
+import math
+import cv2
+
+
+class OpenCVJpegCodec:
+    """JPEG encoding through cv2.imencode (always available)"""
+    name = 'opencv'
+
+    def encode(self, img, quality):
+        ret, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        return buffer.tobytes() if ret else None
+
+
+class TurboJpegCodec:
+    """JPEG encoding through libjpeg-turbo via the optional PyTurboJPEG package"""
+    name = 'turbojpeg'
+
+    def __init__(self):
+        from turbojpeg import TurboJPEG
+        self._jpeg = TurboJPEG()
+
+    def encode(self, img, quality):
+        return self._jpeg.encode(img, quality=int(quality))
+
+
+CODECS = {
+    OpenCVJpegCodec.name: OpenCVJpegCodec,
+    TurboJpegCodec.name: TurboJpegCodec,
+}
+
+
+def get_codec(name='opencv'):
+    """Build the named codec, falling back to OpenCV when its library is missing."""
+    codec_cls = CODECS.get(name)
+    if codec_cls is None:
+        raise ValueError(f"Unknown JPEG codec: {name}")
+    try:
+        return codec_cls()
+    except (ImportError, OSError, RuntimeError) as e:
+        print(f"JPEG codec '{name}' unavailable ({e}), using opencv")
+        return OpenCVJpegCodec()
+
+
+class AdaptiveQuality:
+    """Steers JPEG quality so a stream stays near a target bitrate.
+
+    With no target_kbps the quality stays fixed. Otherwise the per-frame byte
+    budget is target_kbps / fps, and quality moves towards it in steps that
+    grow with how far the recent average frame size is off budget.
+    """
+
+    def __init__(self, fps=30, target_kbps=None, quality=80, min_quality=30, max_quality=90):
+        self.fps = fps
+        self.target_kbps = target_kbps
+        self.quality = quality
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.avg_size = None
+
+    @property
+    def frame_budget(self):
+        if not self.target_kbps:
+            return None
+        return self.target_kbps * 1000 / 8 / self.fps
+
+    def update(self, size):
+        """Feed the size in bytes of the last encoded frame; returns the quality for the next one."""
+        self.avg_size = size if self.avg_size is None else 0.8 * self.avg_size + 0.2 * size
+        budget = self.frame_budget
+        if budget is None:
+            return self.quality
+
+        error = math.log2(self.avg_size / budget)
+        if abs(error) > 0.1:
+            step = max(1, min(10, round(abs(error) * 8)))
+            self.quality += -step if error > 0 else step
+            self.quality = max(self.min_quality, min(self.max_quality, self.quality))
+        return self.quality
@@ -0,0 +1,124 @@
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+
+class RollingHistogram:
+    """The last `size` samples of a timing, summarized as percentiles on demand"""
+
+    def __init__(self, size=512):
+        self._samples = np.zeros(size)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def add(self, value):
+        with self._lock:
+            self._samples[self._count % len(self._samples)] = value
+            self._count += 1
+
+    def summary(self, scale=1000.0):
+        """Percentiles in milliseconds (for samples recorded in seconds)."""
+        with self._lock:
+            n = min(self._count, len(self._samples))
+            samples = self._samples[:n] * scale
+            total = self._count
+        if n == 0:
+            return {'count': 0}
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        return {
+            'count': total,
+            'mean': round(float(samples.mean()), 3),
+            'p50': round(float(p50), 3),
+            'p95': round(float(p95), 3),
+            'p99': round(float(p99), 3),
+            'max': round(float(samples.max()), 3),
+        }
+
+
+class FpsCounter:
+    """Events per second over the last `window` seconds"""
+
+    def __init__(self, window=2.0, size=256):
+        self.window = window
+        self._times = np.zeros(size)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def tick(self, now=None):
+        with self._lock:
+            self._times[self._count % len(self._times)] = now or time.monotonic()
+            self._count += 1
+
+    def rate(self):
+        now = time.monotonic()
+        with self._lock:
+            times = self._times[:min(self._count, len(self._times))]
+            recent = times[times > now - self.window]
+        if len(recent) < 2:
+            return 0.0
+        return round((len(recent) - 1) / max(now - recent.min(), 1e-6), 2)
+
+
+class PipelineMetrics:
+    """Per-stage timings, throughput and error counters for one gesture engine.
+
+    Stages are timed with `with metrics.time('inference'):`; anything may be
+    counted with `count(name)` and rates with `tick(name)`. `snapshot()` is
+    what /api/gestures/metrics returns.
+    """
+
+    def __init__(self, size=512):
+        self._size = size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._rates = {}
+            self._counters = {}
+
+    def _histogram(self, stage):
+        hist = self._stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(stage, RollingHistogram(self._size))
+        return hist
+
+    def record(self, stage, seconds):
+        self._histogram(stage).add(seconds)
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def tick(self, name):
+        counter = self._rates.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._rates.setdefault(name, FpsCounter())
+        counter.tick()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            stages, rates, counters = dict(self._stages), dict(self._rates), dict(self._counters)
+        return {
+            'stages_ms': {name: hist.summary() for name, hist in stages.items()},
+            'fps': {name: counter.rate() for name, counter in rates.items()},
+            'counters': counters,
+        }
+
+
+def timed(metrics, stage):
+    """metrics.time(stage), or a no-op when no metrics object is attached."""
+    return metrics.time(stage) if metrics is not None else contextlib.nullcontext()
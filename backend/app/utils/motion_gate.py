@@ -0,0 +1,91 @@
+import threading
+
+import cv2
+import numpy as np
+
+ACTIVE = 'active'
+IDLE = 'idle'
+
+
+class MotionGate:
+    """Tells a still scene from a busy one using tiny grayscale frame differences.
+
+    Every frame is shrunk to `size`, converted to gray and compared with the
+    previous one. If more than `min_fraction` of the pixels changed by more
+    than `threshold` levels, something moved. The gate goes idle after
+    `idle_after` seconds with no motion and no hand (see activity), and is
+    active again on the first frame that has either. Time spent in each mode
+    is accumulated for reporting.
+    """
+
+    def __init__(self, size=(64, 48), threshold=12, min_fraction=0.005, idle_after=5.0):
+        self.size = size
+        self.threshold = threshold
+        self.min_fraction = min_fraction
+        self.idle_after = idle_after
+        self._lock = threading.Lock()
+
+        w, h = size
+        self._small = np.empty((h, w, 3), dtype=np.uint8)
+        self._gray = np.empty((2, h, w), dtype=np.uint8)
+        self._diff = np.empty((h, w), dtype=np.uint8)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.mode = ACTIVE
+            self.seconds = {ACTIVE: 0.0, IDLE: 0.0}
+            self.transitions = 0
+            self._mode_since = None
+            self._last_activity = None
+            self._has_previous = False
+            self._current = 0
+
+    @property
+    def idle(self):
+        return self.mode == IDLE
+
+    def update(self, t, img):
+        """Feed a captured frame; returns True if the mode changed."""
+        small = cv2.resize(img, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        previous, self._current = self._gray[self._current], 1 - self._current
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray[self._current])
+
+        moving = False
+        if self._has_previous:
+            cv2.absdiff(gray, previous, dst=self._diff)
+            cv2.threshold(self._diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+            moving = cv2.countNonZero(self._diff) >= self.min_fraction * self._diff.size
+        self._has_previous = True
+        return self._advance(t, moving)
+
+    def activity(self, t):
+        """Something other than motion (a detected hand) keeps the scene active; returns True if the mode changed."""
+        return self._advance(t, True)
+
+    def _advance(self, t, active):
+        with self._lock:
+            if self._mode_since is None:
+                self._mode_since = self._last_activity = t
+            if active:
+                self._last_activity = max(self._last_activity, t)
+            mode = IDLE if t - self._last_activity >= self.idle_after else ACTIVE
+            if mode == self.mode:
+                return False
+            self.seconds[self.mode] += t - self._mode_since
+            self.mode = mode
+            self._mode_since = t
+            self.transitions += 1
+            return True
+
+    def snapshot(self, now):
+        """Current mode, seconds spent in each mode so far, and the number of switches."""
+        with self._lock:
+            seconds = dict(self.seconds)
+            if self._mode_since is not None:
+                seconds[self.mode] += now - self._mode_since
+            return {
+                'mode': self.mode,
+                'seconds': {mode: round(s, 3) for mode, s in seconds.items()},
+                'transitions': self.transitions,
+            }
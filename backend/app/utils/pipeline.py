@@ -0,0 +1,121 @@
+import threading
+import time
+
+import numpy as np
+
+
+class Frame:
+    """A captured camera frame travelling through the engine stages"""
+    __slots__ = ('seq', 'timestamp', 'image', 'landmarks', 'pool', 'lease')
+
+    def __init__(self, seq, timestamp, image, pool=None, lease=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+        self.landmarks = None
+        self.pool = pool
+        self.lease = lease
+
+    def release(self):
+        """Called once by each stage the frame was handed to when it is done with the image."""
+        if self.pool is not None:
+            self.pool.release(self.lease)
+
+
+class FramePool:
+    """Reusable image buffers for captured frames.
+
+    The capture stage fills a free buffer instead of allocating a new image
+    every frame. A buffer stays leased until every stage the frame was handed
+    to has released it (a LatestSlot releases the frames it drops). If all
+    buffers are still leased a fresh image is allocated and counted in
+    `misses`, so capture never waits on a slow stage.
+    """
+
+    def __init__(self, size=6):
+        self.size = size
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._leases = []  # [image, refs] per buffer
+
+    def acquire(self, shape, refs):
+        """An image of `shape` and its lease, held until release() has been called `refs` times."""
+        with self._lock:
+            if self._leases and self._leases[0][0].shape != shape:
+                # Resolution changed: frames still out keep their old buffers until they are dropped
+                self._leases = []
+            for lease in self._leases:
+                if lease[1] == 0:
+                    lease[1] = refs
+                    return lease[0], lease
+            if len(self._leases) < self.size:
+                lease = [np.empty(shape, dtype=np.uint8), refs]
+                self._leases.append(lease)
+                return lease[0], lease
+            self.misses += 1
+            return np.empty(shape, dtype=np.uint8), None
+
+    def release(self, lease):
+        if lease is not None:
+            with self._lock:
+                lease[1] = max(0, lease[1] - 1)
+
+
+class LatestSlot:
+    """Single-slot queue between two stages.
+
+    Holds at most one item. Putting a new item replaces (drops) whatever the
+    consumer has not picked up yet, so a slow stage always works on the
+    newest frame instead of falling further behind.
+    """
+
+    def __init__(self, on_drop=None):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+        # Called with every item replaced or discarded before a consumer took it
+        self.on_drop = on_drop
+
+    @property
+    def pending(self):
+        """True if an item is waiting to be picked up."""
+        return self._item is not None
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+                self._drop(self._item)
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Take the newest item, waiting up to `timeout` seconds. Returns None on timeout/close."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._item is None and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._drop(self._item)
+            self._item = None
+            self._cond.notify_all()
+
+    def reset(self):
+        with self._cond:
+            self._closed = False
+            self._drop(self._item)
+            self._item = None
+            self.dropped = 0
+
+    def _drop(self, item):
+        if item is not None and self.on_drop is not None:
+            self.on_drop(item)
@@ -0,0 +1,73 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+from app.utils.metrics import timed
+
+# MediaPipe Pose landmark indexes used for garment placement
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_HIP, RIGHT_HIP = 23, 24
+LEFT_KNEE, RIGHT_KNEE = 25, 26
+LEFT_ANKLE, RIGHT_ANKLE = 27, 28
+
+
+class PoseDetector:
+    """Body landmarks from MediaPipe Pose.
+
+    findPose returns a (33, 4) float32 array of x, y (normalized to the frame),
+    z and visibility, or None when nobody is in view. Like HandDetector the
+    array is a view into a recycled buffer, valid for RESULT_BUFFERS calls.
+    """
+
+    RESULT_BUFFERS = 4
+
+    def __init__(self, modelComplexity=0, detectionCon=0.5, trackCon=0.5, inferenceScale=1.0):
+        self.modelComplexity = modelComplexity
+        self.detectionCon = detectionCon
+        self.trackCon = trackCon
+        self.inferenceScale = inferenceScale
+
+        self.pose = mp.solutions.pose.Pose(
+            static_image_mode=False,
+            model_complexity=self.modelComplexity,
+            smooth_landmarks=True,
+            min_detection_confidence=self.detectionCon,
+            min_tracking_confidence=self.trackCon
+        )
+
+        self._points = np.zeros((self.RESULT_BUFFERS, 33, 4), dtype=np.float32)
+        self._bufferIdx = 0
+        self._scratch = {}
+
+        # Optional PipelineMetrics: times inference when set
+        self.metrics = None
+
+    def _scratchBuffer(self, name, shape):
+        buf = self._scratch.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._scratch[name] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def findPose(self, img):
+        """Run inference once and return the body landmarks, or None."""
+        h, w = img.shape[:2]
+        if self.inferenceScale != 1.0:
+            size = (max(1, round(w * self.inferenceScale)), max(1, round(h * self.inferenceScale)))
+            img = cv2.resize(img, size, dst=self._scratchBuffer('small', (size[1], size[0], 3)),
+                             interpolation=cv2.INTER_AREA)
+        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._scratchBuffer('rgb', img.shape))
+        with timed(self.metrics, 'pose'):
+            results = self.pose.process(imgRGB)
+        if not results.pose_landmarks:
+            return None
+
+        idx = self._bufferIdx
+        self._bufferIdx = (idx + 1) % self.RESULT_BUFFERS
+        points = self._points[idx]
+        points.reshape(-1)[:] = np.fromiter(
+            (v for lm in results.pose_landmarks.landmark for v in (lm.x, lm.y, lm.z, lm.visibility)),
+            dtype=np.float32, count=33 * 4)
+        return points
+
+    def close(self):
+        """Release the MediaPipe graph."""
+        self.pose.close()
@@ -0,0 +1,184 @@
+import collections
+import os
+import queue
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+from app.utils.garment_overlay import border_mask, connected_to_corners, read_image
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'  # the product was deleted or its image replaced before the job ran
+
+
+def resolve_image(url, upload_folder):
+    """Local file path for an /uploads/ URL, the URL itself for http(s), None otherwise."""
+    url = url or ''
+    if url.startswith('/uploads/'):
+        return os.path.join(upload_folder, *url[len('/uploads/'):].split('/'))
+    if url.startswith(('http://', 'https://')):
+        return url
+    return None
+
+
+def segment_garment(img, iterations=4, max_size=512):
+    """Foreground mask (uint8, 0/255 with feathered edges) of a garment product photo.
+
+    Images with an alpha channel use it as is. Otherwise GrabCut refines the
+    plain-background border_mask, which handles shadows and backgrounds that
+    are not perfectly uniform. Runs on a copy at most max_size pixels long.
+    """
+    if img.shape[2] == 4:
+        return np.ascontiguousarray(img[..., 3])
+
+    h, w = img.shape[:2]
+    scale = min(1.0, max_size / max(h, w))
+    small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else img
+    initial = border_mask(small)
+    if not initial.any() or initial.all():
+        mask = initial
+    else:
+        labels = np.where(initial > 127, cv2.GC_PR_FGD, cv2.GC_PR_BGD).astype(np.uint8)
+        labels[:2, :] = labels[-2:, :] = labels[:, :2] = labels[:, -2:] = cv2.GC_BGD
+        bgd_model = np.zeros((1, 65), np.float64)
+        fgd_model = np.zeros((1, 65), np.float64)
+        cv2.grabCut(small, labels, None, bgd_model, fgd_model, iterations, cv2.GC_INIT_WITH_MASK)
+        background = (labels == cv2.GC_BGD) | (labels == cv2.GC_PR_BGD)
+        # Background-coloured prints enclosed by the garment are still garment
+        mask = np.where(connected_to_corners(background), 0, 255).astype(np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+        mask = cv2.GaussianBlur(mask, (5, 5), 0)
+
+    if mask.shape != (h, w):
+        mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_LINEAR)
+    return mask
+
+
+class SegmentationQueue:
+    """Computes product segmentation masks on a background thread.
+
+    Jobs are queued when a product image is created or replaced, or in bulk to
+    reprocess a catalog. A job reads the product's current image, writes the
+    mask PNG under UPLOAD_FOLDER/masks, and stores its URL in
+    segmentation_mask_path with segmentation_ready set. Job status is kept in
+    memory for the last `history` jobs.
+    """
+
+    def __init__(self, history=500):
+        self.app = None
+        self._queue = queue.Queue()
+        self._jobs = collections.OrderedDict()
+        self._history = history
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name='segmentation')
+            self._thread.start()
+
+    def enqueue(self, product_id):
+        """Queue a mask for a product; returns the job's status dict."""
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'product_id': product_id,
+            'status': QUEUED,
+            'error': None,
+            'mask_path': None,
+            'queued_at': time.time(),
+            'finished_at': None,
+        }
+        with self._lock:
+            self._jobs[job['job_id']] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+            self._start()
+        self._queue.put(job['job_id'])
+        return dict(job)
+
+    def job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def latest_job(self, product_id):
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job['product_id'] == product_id:
+                    return dict(job)
+        return None
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            job = self.job(job_id)
+            if job is None:
+                continue
+            self._update(job_id, status=RUNNING)
+            try:
+                with self.app.app_context():
+                    status, mask_path = self._process(job['product_id'])
+                self._update(job_id, status=status, mask_path=mask_path, finished_at=time.time())
+            except Exception as e:
+                print(f"Segmentation job {job_id} for product {job['product_id']} failed: {e}")
+                self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+    def _process(self, product_id):
+        from app import db
+        from app.models.product import Product
+
+        product = Product.query.get(product_id)
+        if product is None:
+            return SKIPPED, None
+        image_url = product.image_url
+        source = resolve_image(image_url, self.app.config['UPLOAD_FOLDER'])
+        if source is None:
+            raise ValueError(f"Product has no usable image: {image_url!r}")
+
+        # The slow part runs without holding a database transaction open
+        db.session.rollback()
+        mask = segment_garment(read_image(source))
+
+        mask_dir = os.path.join(self.app.config['UPLOAD_FOLDER'], 'masks')
+        os.makedirs(mask_dir, exist_ok=True)
+        filename = f"{product_id}_{uuid.uuid4().hex[:8]}.png"
+        cv2.imwrite(os.path.join(mask_dir, filename), mask)
+
+        product = Product.query.get(product_id)
+        if product is None or product.image_url != image_url:
+            # Deleted or given a new image meanwhile; that change queued its own job
+            os.remove(os.path.join(mask_dir, filename))
+            return SKIPPED, None
+        old_mask = product.segmentation_mask_path
+        product.segmentation_mask_path = f"/uploads/masks/{filename}"
+        product.segmentation_ready = True
+        db.session.commit()
+        remove_upload(old_mask, self.app.config['UPLOAD_FOLDER'])
+        return DONE, product.segmentation_mask_path
+
+
+def remove_upload(url, upload_folder):
+    """Delete a file under UPLOAD_FOLDER given its /uploads/ URL, if it exists."""
+    path = resolve_image(url, upload_folder) if url and url.startswith('/uploads/') else None
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+# Shared queue, bound to the app in create_app
+segmentation = SegmentationQueue()
@@ -0,0 +1,166 @@
+import threading
+import time
+
+
+class EncodedFrame:
+    """An encoded JPEG shared read-only by every viewer"""
+    __slots__ = ('seq', 'timestamp', 'data')
+
+    def __init__(self, seq, timestamp, data):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.data = data
+
+
+class FrameHub:
+    """Broadcasts the latest encoded frame to any number of viewers.
+
+    Every published frame gets an increasing sequence number. Viewers remember
+    the last sequence they sent and block in `wait_for` until a newer frame is
+    published, so nobody wakes up to resend a frame they already have.
+
+    Viewers also attach/detach so the producer can skip encoding entirely while
+    nobody is watching. Hubs fed by the same producer can share a `demand`
+    Condition, notified on every attach, so the producer can sleep until any
+    of them has a viewer (see wait_for_viewers).
+
+    Listeners added with add_listener are called after every publish and on
+    close, from the publishing thread, for consumers that cannot block in
+    wait_for (the asyncio stream server).
+    """
+
+    def __init__(self, demand=None):
+        self._cond = threading.Condition()
+        self._latest = None
+        self._seq = 0
+        self._closed = False
+        self._subscribers = 0
+        self._listeners = ()
+        self.demand = demand
+
+    @property
+    def subscribers(self):
+        return self._subscribers
+
+    def attach(self):
+        with self._cond:
+            self._subscribers += 1
+            self._cond.notify_all()
+        self._notify_demand()
+
+    def detach(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def add_listener(self, callback):
+        with self._cond:
+            self._listeners = self._listeners + (callback,)
+
+    def remove_listener(self, callback):
+        with self._cond:
+            self._listeners = tuple(c for c in self._listeners if c != callback)
+
+    def wait_for_subscribers(self, timeout=None):
+        """Block until at least one viewer is attached. Returns False on timeout/close."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._subscribers > 0 or self._closed, timeout)
+            return self._subscribers > 0 and not self._closed
+
+    def publish(self, data, timestamp=None):
+        with self._cond:
+            self._seq += 1
+            self._latest = latest = EncodedFrame(self._seq, timestamp or time.time(), data)
+            self._cond.notify_all()
+        self._notify_listeners()
+        return latest
+
+    def latest(self):
+        with self._cond:
+            return self._latest
+
+    def wait_for(self, after_seq=0, timeout=None):
+        """Return the newest frame with seq > after_seq, or None on timeout/close."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed and (self._latest is None or self._latest.seq <= after_seq):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if self._closed:
+                return None
+            return self._latest
+
+    def close(self):
+        """Wake every waiting viewer so streams can finish."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._notify_demand()
+        self._notify_listeners()
+
+    def _notify_listeners(self):
+        for callback in self._listeners:
+            callback()
+
+    def _notify_demand(self):
+        if self.demand is not None:
+            with self.demand:
+                self.demand.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._closed = False
+            self._latest = None
+
+
+def wait_for_viewers(hubs, demand, timeout=None):
+    """Block until a hub sharing `demand` has a viewer; returns the hubs that do (empty on timeout).
+
+    hubs may be a callable returning the current hubs, re-read on every wake,
+    for a set of hubs that grows while the producer waits.
+    """
+    current = hubs if callable(hubs) else lambda: hubs
+    with demand:
+        demand.wait_for(lambda: any(hub.subscribers for hub in current()), timeout)
+    return [hub for hub in current() if hub.subscribers]
+
+
+def parse_variant(args):
+    """Stream variant options from request query args: overlay=1, width, fps and quality.
+
+    Raises ValueError for values that are not numbers.
+    """
+    options = {'overlay': args.get('overlay') == '1'}
+    for name, kind in (('width', int), ('fps', float), ('quality', int)):
+        value = args.get(name)
+        options[name] = kind(value) if value not in (None, '') else None
+    return options
+
+
+class StreamVariant:
+    """One rendition of an engine's stream and the hub its viewers attach to.
+
+    A variant is the clean or overlay image at an output width, an fps cap and
+    a JPEG quality; None means the engine's own setting (full width,
+    stream_fps, adaptive quality). The engine resizes and encodes each
+    distinct rendition once per frame however many variants and viewers
+    share it.
+    """
+
+    def __init__(self, overlay=False, width=None, fps=None, quality=None, demand=None):
+        self.overlay = overlay
+        self.width = width
+        self.fps = fps
+        self.quality = quality
+        self.hub = FrameHub(demand=demand)
+        self.next_due = 0  # monotonic time this variant wants its next frame
+        self.unused_since = time.monotonic()  # None while someone watches
+
+    @property
+    def key(self):
+        return self.overlay, self.width, self.fps, self.quality
+
+    def describe(self):
+        return {'overlay': self.overlay, 'width': self.width, 'fps': self.fps, 'quality': self.quality,
+                'subscribers': self.hub.subscribers}
@@ -0,0 +1,295 @@
+"""
+Event-loop server for the gesture video and event streams
+
+The Flask routes /api/gestures/video_feed and /events hold a worker thread
+per open stream. This server answers the same paths (and the same
+/<kiosk_id>/... forms and query parameters) from a single asyncio thread
+next to the app, so any number of viewers costs no threads at all:
+
+    GET /api/gestures/video_feed[?overlay=1&width=&fps=&quality=]   MJPEG
+    GET /api/gestures/events[?format=binary]                        SSE (default) or binary packets
+
+Hubs call a listener on every publish, which wakes that hub's viewers on
+the loop. Each viewer writes one frame and waits for its socket to drain
+before taking whatever frame is newest by then, so a slow client skips
+frames instead of queueing them, and never holds up anyone else. Gesture
+events are never skipped: a slow event client gets the packets it missed
+in one batch (see GestureEventHub).
+"""
+
+import asyncio
+import json
+import threading
+import urllib.parse
+
+from app.utils.engine_registry import registry
+from app.utils.event_stream import encode_binary, encode_json, parse_last_event_id
+from app.utils.stream_hub import parse_variant
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+            503: 'Service Unavailable'}
+
+
+class _Feed:
+    """Wakes the loop's viewers of one hub whenever the hub publishes."""
+
+    def __init__(self, loop, hub):
+        self.loop = loop
+        self.hub = hub
+        self.viewers = 0
+        self.changed = asyncio.Event()  # replaced by a fresh event on every wake
+
+    def notify(self):
+        """Hub listener; runs on the publishing thread."""
+        self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class StreamServer:
+    """Serves the gesture streams of every kiosk from one event-loop thread.
+
+    A viewer whose socket has not drained within `write_timeout` seconds is
+    disconnected. `origins` are the browser origins allowed to read the
+    streams cross-origin (EventSource, fetch); img tags need none.
+    """
+
+    def __init__(self, write_timeout=30.0, keep_alive=15.0):
+        self.write_timeout = write_timeout
+        self.keep_alive = keep_alive
+        self.origins = ()
+        self.port = None
+        self.connections = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self._feeds = {}
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._failed = False
+        self._start_lock = threading.Lock()
+
+    def start(self, host='127.0.0.1', port=5001, origins=()):
+        """Bind and serve on a daemon thread. Returns False if the port could not be bound.
+
+        Safe to call repeatedly and from several threads; after a failed bind
+        it does not try again.
+        """
+        with self._start_lock:
+            if self._thread is not None:
+                return True
+            if self._failed:
+                return False
+            self.origins = tuple(origins)
+            started = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(host, port, started), daemon=True,
+                                            name='stream-server')
+            self._thread.start()
+            started.wait()
+            if self._server is None:
+                self._thread = None
+                self._failed = True
+                return False
+            return True
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self, host, port, started):
+        loop = self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, host, port, backlog=1024, limit=16 * 1024))
+        except OSError as e:
+            print(f"Stream server could not listen on {host}:{port}: {e}")
+            loop.close()
+            started.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"Stream server listening on http://{host}:{self.port}")
+        started.set()
+        try:
+            loop.run_forever()
+        finally:
+            # Let every open stream run its cleanup so the hubs stop counting its viewer
+            self._server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._feeds.clear()
+            self._server = None
+            loop.close()
+
+    def stats(self):
+        return {
+            'port': self.port,
+            'connections': self.connections,
+            'viewers': sum(feed.viewers for feed in self._feeds.values()),
+            'frames_sent': self.frames_sent,
+            'frames_skipped': self.frames_skipped,
+        }
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=10)
+                method, target, _ = head.decode('latin-1').split('\r\n', 1)[0].split(' ', 2)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                    UnicodeDecodeError, ValueError):
+                return
+            headers = {}
+            for line in head.decode('latin-1').split('\r\n')[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+            url = urllib.parse.urlsplit(target)
+            args = dict(urllib.parse.parse_qsl(url.query))
+            await self._route(writer, method, url.path, args, headers)
+        except (ConnectionError, asyncio.TimeoutError, asyncio.CancelledError):
+            pass  # the viewer went away or stopped reading, or the server is stopping
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _route(self, writer, method, path, args, headers):
+        origin = headers.get('origin')
+        parts = path.strip('/').split('/')
+        if parts[:2] != ['api', 'gestures'] or len(parts) not in (3, 4) or parts[-1] not in ('video_feed', 'events'):
+            return await self._send_json(writer, 404, {'success': False, 'error': 'Not found'}, origin)
+        if method != 'GET':
+            return await self._send_json(writer, 405, {'success': False, 'error': 'Method not allowed'}, origin)
+
+        kiosk_id = parts[2] if len(parts) == 4 else 'default'
+        loop = asyncio.get_running_loop()
+        engine = await loop.run_in_executor(None, registry.get, kiosk_id)
+        if engine is None:
+            return await self._send_json(writer, 404, {'success': False, 'error': f'Unknown kiosk: {kiosk_id}'},
+                                         origin)
+
+        if parts[-1] == 'video_feed':
+            try:
+                hub = engine.stream_variant(**parse_variant(args))
+            except ValueError:
+                return await self._send_json(writer, 400, {'success': False,
+                                                           'error': 'width, fps and quality must be numbers'}, origin)
+            if hub is None:
+                return await self._send_json(writer, 503, {'success': False, 'error': 'Too many stream variants in use'},
+                                             origin)
+            if not engine.is_running:
+                await loop.run_in_executor(None, engine.start)  # autostart, as the Flask route does
+            writer.write(self._head(200, 'multipart/x-mixed-replace; boundary=frame', origin))
+            await self._stream_frames(writer, engine, hub)
+        else:
+            if not engine.is_running:
+                return await self._send_json(writer, 409, {'success': False, 'error': 'Gesture control is not running'},
+                                             origin)
+            binary = args.get('format', 'json') == 'binary'
+            writer.write(self._head(200, 'application/octet-stream' if binary else 'text/event-stream', origin))
+            await self._stream_events(writer, engine, binary, parse_last_event_id(headers.get('last-event-id')))
+
+    def _head(self, status, content_type, origin, length=None):
+        lines = [f'HTTP/1.1 {status} {_REASONS[status]}', f'Content-Type: {content_type}',
+                 'Cache-Control: no-cache', 'X-Accel-Buffering: no', 'Connection: close']
+        if length is not None:
+            lines.append(f'Content-Length: {length}')
+        if origin and origin in self.origins:
+            lines += [f'Access-Control-Allow-Origin: {origin}', 'Vary: Origin']
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _send_json(self, writer, status, payload, origin):
+        body = json.dumps(payload).encode()
+        writer.write(self._head(status, 'application/json', origin, len(body)) + body)
+        await self._drain(writer)
+
+    async def _drain(self, writer):
+        await asyncio.wait_for(writer.drain(), self.write_timeout)
+
+    def _attach(self, hub):
+        feed = self._feeds.get(id(hub))
+        if feed is None:
+            feed = self._feeds[id(hub)] = _Feed(self._loop, hub)
+        if not feed.viewers:
+            hub.add_listener(feed.notify)
+        feed.viewers += 1
+        return feed
+
+    def _detach(self, feed):
+        feed.viewers -= 1
+        if not feed.viewers:
+            # Stream variant hubs come and go, so feeds are not kept for hubs nobody watches
+            feed.hub.remove_listener(feed.notify)
+            del self._feeds[id(feed.hub)]
+
+    @staticmethod
+    async def _wait(changed, timeout):
+        """Wait up to timeout for the hub to publish after `changed` was taken from its feed."""
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _stream_frames(self, writer, engine, hub):
+        feed = self._attach(hub)
+        hub.attach()
+        last_seq = 0
+        try:
+            while engine.is_running:
+                changed = feed.changed
+                frame = hub.latest()
+                if frame is None or frame.seq <= last_seq:
+                    await self._wait(changed, 1.0)
+                    continue
+                if last_seq and frame.seq > last_seq + 1:
+                    # Published while this viewer was still draining the previous one
+                    self.frames_skipped += frame.seq - last_seq - 1
+                last_seq = frame.seq
+
+                writer.write(b'--frame\r\nContent-Type: image/jpeg\r\n'
+                             b'Content-Length: %d\r\nX-Frame-Seq: %d\r\nX-Capture-Timestamp: %.6f\r\n\r\n'
+                             % (len(frame.data), frame.seq, frame.timestamp))
+                writer.write(frame.data)
+                writer.write(b'\r\n')
+                await self._drain(writer)
+                self.frames_sent += 1
+        finally:
+            hub.detach()
+            self._detach(feed)
+
+    async def _stream_events(self, writer, engine, binary, last_event_id=None):
+        hub = engine.events
+        feed = self._attach(hub)
+        last_seq = hub.attach(last_event_id)
+        try:
+            while engine.is_running:
+                changed = feed.changed
+                packets = hub.wait_for(last_seq, timeout=0)
+                if not packets:
+                    await self._wait(changed, self.keep_alive)
+                    if not binary and feed.changed is changed:
+                        # Nothing published: an SSE comment keeps proxies from timing out the stream
+                        writer.write(b': keep-alive\n\n')
+                        await self._drain(writer)
+                    continue
+                last_seq = packets[-1].seq
+
+                if binary:
+                    writer.write(b''.join(encode_binary(p) for p in packets))
+                else:
+                    writer.write(''.join(f'id: {p.seq}\ndata: {encode_json(p)}\n\n' for p in packets).encode())
+                await self._drain(writer)
+        finally:
+            hub.detach()
+            self._detach(feed)
+
+
+# Shared server, started by create_app in the process that serves the Flask app
+stream_server = StreamServer()
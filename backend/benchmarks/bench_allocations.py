@@ -0,0 +1,127 @@
+"""
+Per-frame allocation benchmark of the capture -> inference input -> encode path
+
+Runs the per-frame image work of the gesture pipeline on synthetic frames
+two ways and reports, per frame:
+  transient KB   peak memory allocated and freed again within the frame (tracemalloc)
+  gc gen0        garbage collections triggered per 1000 frames
+  frame ms       p50/p99 time, where allocator churn shows up as jitter
+
+  allocating   what the engine used to do: read a new image, cv2.flip and
+               cv2.cvtColor into new arrays, copy the overlay frame
+  pooled       what it does now: read into one image, flip into a FramePool
+               buffer, convert and copy the overlay into reused buffers
+
+Both paths JPEG-encode the frame, which allocates the output bytes the
+stream hub shares with every viewer; --no-encode leaves that out.
+
+Usage:
+cd backend
+python benchmarks/bench_allocations.py [--frames 600] [--resolution 640x480] [--no-encode]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.frame_source import SyntheticSource
+from app.utils.jpeg_codec import OpenCVJpegCodec
+from app.utils.pipeline import Frame, FramePool
+
+
+def allocating(source, codec, encode):
+    def step():
+        success, img = source.read()
+        img = cv2.flip(img, 1)
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        overlay = img.copy()
+        if encode:
+            codec.encode(overlay, 80)
+        return rgb
+    return step
+
+
+def pooled(source, codec, encode):
+    pool = FramePool()
+    state = {'raw': None, 'rgb': None, 'overlay': None}
+
+    def step():
+        success, state['raw'] = source.read(state['raw'])
+        raw = state['raw']
+        image, lease = pool.acquire(raw.shape, refs=2)
+        cv2.flip(raw, 1, dst=image)
+        frame = Frame(0, 0, image, pool, lease)
+        if state['rgb'] is None:
+            state['rgb'] = np.empty_like(image)
+            state['overlay'] = np.empty_like(image)
+        cv2.cvtColor(frame.image, cv2.COLOR_BGR2RGB, dst=state['rgb'])
+        frame.release()  # inference done
+        np.copyto(state['overlay'], frame.image)
+        if encode:
+            codec.encode(state['overlay'], 80)
+        frame.release()  # encode done
+        return state['rgb']
+    return step
+
+
+def measure(step, frames):
+    for _ in range(30):
+        step()  # let buffers and pools settle before measuring
+
+    gc.collect()
+    collections = gc.get_stats()[0]['collections']
+    transient = np.zeros(frames)
+    times = np.zeros(frames)
+    tracemalloc.start()
+    for i in range(frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        step()
+        times[i] = time.perf_counter() - start
+        transient[i] = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    gen0 = gc.get_stats()[0]['collections'] - collections
+
+    # tracemalloc slows every allocation down, so time a second, untraced run
+    for i in range(frames):
+        start = time.perf_counter()
+        step()
+        times[i] = time.perf_counter() - start
+    return {
+        'transient_kb': transient.mean() / 1024,
+        'gc_per_1000': gen0 * 1000 / frames,
+        'p50_ms': np.percentile(times, 50) * 1000,
+        'p99_ms': np.percentile(times, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--resolution', default='640x480')
+    parser.add_argument('--no-encode', dest='encode', action='store_false')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.split('x'))
+    codec = OpenCVJpegCodec()
+    print(f"{args.frames} frames at {width}x{height}, encode={'on' if args.encode else 'off'}")
+    print(f"{'path':<12} {'transient KB':>13} {'gc gen0/1000':>13} {'frame ms p50':>13} {'p99':>7}")
+    for name, build in (('allocating', allocating), ('pooled', pooled)):
+        source = SyntheticSource(width, height, realtime=False)
+        source.open()
+        r = measure(build(source, codec, args.encode), args.frames)
+        print(f"{name:<12} {r['transient_kb']:>13.1f} {r['gc_per_1000']:>13.1f} "
+              f"{r['p50_ms']:>13.2f} {r['p99_ms']:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
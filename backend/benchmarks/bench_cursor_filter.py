@@ -0,0 +1,132 @@
+"""
+Benchmark cursor smoothing filters on landmark traces
+
+Replays an index-fingertip trace through each cursor filter and reports:
+  lag    - time shift (ms) that best aligns the output with the true path,
+           searched in 1 ms steps against the linearly interpolated truth
+  jitter - RMS movement (px) of the output while the hand is holding still,
+           skipping a settle window after each movement so the filter
+           catching up is not counted as jitter
+
+A trace is a CSV with a header and columns t,x,y (seconds, x/y normalized
+0..1). Without --trace a synthetic trace is used: hold, fast sweep, hold,
+slow drift, hold, with landmark noise added. For recorded traces the "true"
+path is a centered (zero-lag) moving average of the raw samples.
+
+Usage:
+cd backend
+python benchmarks/bench_cursor_filter.py [--trace trace.csv] [--hz 15] [--settle 0.3]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.cursor_filter import OneEuroFilter
+
+SCREEN = np.array([1920.0, 1080.0])
+
+
+class FixedDivisor:
+    """The previous `ploc + (x - ploc) / smoothening` smoothing, for comparison"""
+
+    def __init__(self, smoothening=5):
+        self.smoothening = smoothening
+        self.x = None
+
+    def __call__(self, t, x):
+        x = np.asarray(x, dtype=np.float64)
+        self.x = x if self.x is None else self.x + (x - self.x) / self.smoothening
+        return self.x
+
+
+class Passthrough:
+    def __call__(self, t, x):
+        return np.asarray(x, dtype=np.float64)
+
+
+def synthetic_trace(hz, noise=0.002, seed=0):
+    """Returns (t, raw, truth) with positions in normalized units."""
+    rng = np.random.default_rng(seed)
+    segments = [
+        (1.0, lambda u: np.array([0.3, 0.5]) + 0 * u),              # hold
+        (0.4, lambda u: np.array([0.3 + 0.4 * u, 0.5 - 0.2 * u])),  # fast sweep
+        (1.0, lambda u: np.array([0.7, 0.3]) + 0 * u),              # hold
+        (1.5, lambda u: np.array([0.7 - 0.1 * u, 0.3 + 0.1 * u])),  # slow drift
+        (1.0, lambda u: np.array([0.6, 0.4]) + 0 * u),              # hold
+    ]
+    ts, truth = [], []
+    start = 0.0
+    for duration, path in segments:
+        n = int(duration * hz)
+        u = np.arange(n) / n
+        ts.append(start + u * duration)
+        truth.append(np.stack([path(v) for v in u]))
+        start += duration
+    t = np.concatenate(ts)
+    truth = np.concatenate(truth)
+    raw = truth + rng.normal(0, noise, truth.shape)
+    return t, raw, truth
+
+
+def load_trace(path, window=5):
+    data = np.loadtxt(path, delimiter=',', skiprows=1)
+    t, raw = data[:, 0], data[:, 1:3]
+    kernel = np.ones(window) / window
+    truth = np.stack([np.convolve(raw[:, i], kernel, mode='same') for i in range(2)], axis=1)
+    return t, raw, truth
+
+
+def evaluate(filt, t, raw, truth, settle=0.3):
+    out = np.stack([filt(ti, xi * SCREEN) for ti, xi in zip(t, raw)])
+    truth_px = truth * SCREEN
+
+    # Lag: delay of the true path that minimizes the tracking error. The truth is
+    # interpolated between samples, so the lag is not limited to whole sample periods.
+    dt = np.median(np.diff(t))
+    lags = np.arange(0, min(20, len(t) // 2) * dt, 0.001)
+    errors = []
+    for lag in lags:
+        valid = t - lag >= t[0]
+        shifted = np.stack([np.interp(t[valid] - lag, t, truth_px[:, i]) for i in range(2)], axis=1)
+        errors.append(np.sqrt(np.mean(np.sum((out[valid] - shifted) ** 2, axis=1))))
+    lag_ms = lags[int(np.argmin(errors))] * 1000
+
+    # Jitter: frame-to-frame output motion where the true path is still and has been
+    # for `settle` seconds
+    still = np.r_[False, np.all(np.abs(np.diff(truth_px, axis=0)) < 0.5, axis=1)]
+    last_move = np.maximum.accumulate(np.where(still, -np.inf, t))
+    settled = still & (t - last_move >= settle)
+    steps = np.linalg.norm(np.diff(out, axis=0), axis=1)[settled[1:]]
+    jitter = float(np.sqrt(np.mean(steps ** 2))) if len(steps) else float('nan')
+    return lag_ms, jitter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trace', help='CSV trace with t,x,y columns')
+    parser.add_argument('--hz', type=float, default=15, help='sample rate of the synthetic trace')
+    parser.add_argument('--settle', type=float, default=0.3,
+                        help='seconds after each movement left out of the jitter measurement')
+    args = parser.parse_args()
+
+    t, raw, truth = load_trace(args.trace) if args.trace else synthetic_trace(args.hz)
+    filters = {
+        'raw': Passthrough,
+        'divisor/5': FixedDivisor,
+        'one-euro': lambda: OneEuroFilter(min_cutoff=1.0, beta=0.007),
+        'one-euro+lead': lambda: OneEuroFilter(min_cutoff=1.0, beta=0.007, lead=0.03),
+    }
+    print(f"{len(t)} samples over {t[-1] - t[0]:.1f}s")
+    print(f"{'filter':<15} {'lag ms':>7} {'jitter px':>10}")
+    for name, make in filters.items():
+        lag_ms, jitter = evaluate(make(), t, raw, truth, args.settle)
+        print(f"{name:<15} {lag_ms:>7.0f} {jitter:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark of single-pass holistic inference against separate hand and pose models
+
+Feeds the same frames to:
+  hands      HandDetector alone (gesture control only, no garment fitting)
+  separate   HandDetector followed by PoseDetector, as the engine does in
+             'hands' mode while a garment is selected
+  holistic   HolisticDetector, pose and both hands from one pass
+
+and reports inference time per frame (p50/p95/p99 ms), process CPU time
+per frame, and how often hands and a body were found. The pose model runs
+at the same --complexity in 'separate' and 'holistic' so the two compare
+like for like (the engine uses 0 for PoseDetector and 1 for Holistic).
+Synthetic frames contain no people, so they measure the detection-only
+worst case; pass --source with a recording of someone at the kiosk for
+tracking numbers.
+
+Usage:
+cd backend
+python benchmarks/bench_holistic.py [--source synthetic|video.mp4|frames_dir] [--frames 300]
+                                    [--resolution 640x480] [--scale 1.0] [--complexity 1]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.frame_source import SyntheticSource, make_source
+from app.utils.hand_tracking import HandDetector
+from app.utils.holistic_tracking import HolisticDetector
+from app.utils.pose_tracking import PoseDetector
+
+
+def load_frames(spec, width, height, count):
+    source = SyntheticSource(width, height, realtime=False) if spec == 'synthetic' else make_source(spec, width, height)
+    source.realtime = False
+    if not source.open():
+        raise RuntimeError(f"Could not open source {spec}")
+    frames = []
+    while len(frames) < count:
+        success, img = source.read()
+        if not success:
+            break
+        frames.append(img)
+    source.release()
+    return frames
+
+
+def hands_only(scale, complexity):
+    hands = HandDetector(inferenceScale=scale)
+
+    def step(img):
+        return len(hands.findHands(img)), False
+    return step, [hands]
+
+
+def separate(scale, complexity):
+    hands = HandDetector(inferenceScale=scale)
+    pose = PoseDetector(modelComplexity=complexity, inferenceScale=scale)
+
+    def step(img):
+        return len(hands.findHands(img)), pose.findPose(img) is not None
+    return step, [hands, pose]
+
+
+def holistic(scale, complexity):
+    detector = HolisticDetector(modelComplexity=complexity, inferenceScale=scale)
+
+    def step(img):
+        found = detector.findAll(img)
+        return len(found.hands), found.pose is not None
+    return step, [detector]
+
+
+def measure(step, frames):
+    for img in frames[:10]:
+        step(img)  # load and warm up the graphs
+
+    times = np.zeros(len(frames))
+    hand_frames = body_frames = 0
+    cpu_start = time.process_time()
+    for i, img in enumerate(frames):
+        start = time.perf_counter()
+        hands, body = step(img)
+        times[i] = time.perf_counter() - start
+        hand_frames += hands > 0
+        body_frames += body
+    cpu = time.process_time() - cpu_start
+    p50, p95, p99 = np.percentile(times * 1000, (50, 95, 99))
+    return {
+        'p50': p50, 'p95': p95, 'p99': p99,
+        'cpu_ms': cpu / len(frames) * 1000,
+        'hands': hand_frames / len(frames),
+        'body': body_frames / len(frames),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default='synthetic')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--resolution', default='640x480')
+    parser.add_argument('--scale', type=float, default=1.0, help='inference downscale factor')
+    parser.add_argument('--complexity', type=int, choices=(0, 1, 2), default=1,
+                        help='pose model complexity for both separate and holistic')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.split('x'))
+    frames = load_frames(args.source, width, height, args.frames)
+    print(f"{len(frames)} frames at {width}x{height}, inference scale {args.scale}, "
+          f"pose model complexity {args.complexity}")
+    print(f"{'mode':<10} {'ms p50/95/99':>20} {'cpu ms/frame':>13} {'hands found':>12} {'body found':>11}")
+    for name, build in (('hands', hands_only), ('separate', separate), ('holistic', holistic)):
+        step, detectors = build(args.scale, args.complexity)
+        r = measure(step, frames)
+        for detector in detectors:
+            detector.close()
+        print(f"{name:<10} {r['p50']:>6.1f}/{r['p95']:>6.1f}/{r['p99']:>6.1f} {r['cpu_ms']:>13.1f} "
+              f"{r['hands']:>11.0%} {r['body']:>11.0%}")
+
+
+if __name__ == '__main__':
+    main()
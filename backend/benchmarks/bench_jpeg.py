@@ -0,0 +1,67 @@
+"""
+Benchmark the JPEG codecs used by the gesture stream
+
+Encodes a camera-like 640x480 frame with every available codec at a few
+quality settings and reports encode time and frame size.
+
+Usage:
+cd backend
+python benchmarks/bench_jpeg.py [--frames 200] [--width 640] [--height 480]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.jpeg_codec import CODECS
+
+
+def make_frame(width, height):
+    """Smooth gradients plus noise: compresses roughly like a real webcam frame."""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.dstack([x + 0 * y, y + 0 * x, (x + y) / 2]).astype(np.uint8)
+    noise = np.random.default_rng(0).integers(0, 24, img.shape, dtype=np.uint8)
+    img = cv2.add(img, noise)
+    cv2.circle(img, (width // 2, height // 2), min(width, height) // 4, (40, 160, 220), -1)
+    return img
+
+
+def bench(codec, img, quality, frames):
+    codec.encode(img, quality)  # warm up
+    start = time.perf_counter()
+    size = 0
+    for _ in range(frames):
+        size = len(codec.encode(img, quality))
+    elapsed = time.perf_counter() - start
+    return elapsed / frames * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    args = parser.parse_args()
+
+    img = make_frame(args.width, args.height)
+    print(f"{'codec':<10} {'quality':>7} {'ms/frame':>9} {'fps':>7} {'KB':>7}")
+    for name, codec_cls in CODECS.items():
+        try:
+            codec = codec_cls()
+        except (ImportError, OSError, RuntimeError) as e:
+            print(f"{name:<10} skipped ({e})")
+            continue
+        for quality in (50, 70, 80, 95):
+            ms, size = bench(codec, img, quality, args.frames)
+            print(f"{name:<10} {quality:>7} {ms:>9.2f} {1000 / ms:>7.0f} {size / 1024:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
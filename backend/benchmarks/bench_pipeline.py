@@ -0,0 +1,112 @@
+"""
+End-to-end benchmark of the gesture pipeline without a camera
+
+Runs a full GestureEngine (real MediaPipe detector, null cursor driver) on
+a replayed video, an image sequence or synthetic frames, for a grid of
+resolutions and detector settings, and reports per configuration:
+  fps       capture / inference / stream rates actually sustained
+  latency   capture-to-cursor and capture-to-stream p50/p95/p99 (ms)
+  cpu       process CPU time per captured frame (ms, all threads)
+
+Synthetic frames contain no hands, so they measure the palm-detection
+worst case; pass --source with a recording of someone at the kiosk for
+realistic tracking numbers.
+
+Usage:
+cd backend
+python benchmarks/bench_pipeline.py [--source synthetic|video.mp4|frames_dir] [--seconds 10]
+                                    [--realtime] [--stream] [--resolutions 640x480,320x240]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.utils.frame_source import SyntheticSource, make_source
+from app.utils.gesture_engine import GestureEngine
+
+DETECTOR_SETTINGS = [
+    {'inference_scale': 1.0, 'inference_roi': False},
+    {'inference_scale': 0.5, 'inference_roi': False},
+    {'inference_scale': 0.5, 'inference_roi': True},
+]
+
+
+def build_source(spec, width, height, realtime):
+    if spec == 'synthetic':
+        return SyntheticSource(width, height, realtime=realtime)
+    source = make_source(spec, width, height)
+    source.realtime = realtime
+    source.loop = True
+    return source
+
+
+def run(source, seconds, stream, width, height, **settings):
+    # Idle mode off: a still synthetic or recorded scene would otherwise drop to idle rates
+    engine = GestureEngine(source=source, cursor='null', inference_hz=None, idle_after=None, **settings)
+    engine.wCam, engine.hCam = width, height
+    if not engine.start():
+        raise RuntimeError(f"Could not open source {source}")
+    if stream:
+        engine.hub.attach()
+
+    time.sleep(1.0)  # warm up the model before measuring
+    engine.metrics.reset()
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.monotonic() - wall_start
+    data = engine.get_metrics()
+
+    if stream:
+        engine.hub.detach()
+    engine.stop()
+
+    stages = data['stages_ms']
+    frames = stages.get('read', {}).get('count', 0)
+    inferences = stages.get('inference', {}).get('count', 0)
+    return {
+        'capture_fps': frames / wall,
+        'inference_fps': inferences / wall,
+        'stream_fps': stages.get('encode', {}).get('count', 0) / wall,
+        'cursor': stages.get('capture_to_cursor', {}),
+        'stream': stages.get('capture_to_stream', {}),
+        'inference_ms': stages.get('inference', {}),
+        'cpu_ms_per_frame': cpu / max(frames, 1) * 1000,
+        'cpu_ms_per_inference': cpu / max(inferences, 1) * 1000,
+    }
+
+
+def fmt(summary):
+    if not summary.get('count'):
+        return '-'
+    return f"{summary['p50']:.1f}/{summary['p95']:.1f}/{summary['p99']:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default='synthetic')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--realtime', action='store_true', help='play the source at its own fps instead of max speed')
+    parser.add_argument('--stream', action='store_true', help='keep a stream subscriber attached so frames are encoded')
+    parser.add_argument('--resolutions', default='640x480,320x240')
+    args = parser.parse_args()
+
+    resolutions = [tuple(int(v) for v in r.split('x')) for r in args.resolutions.split(',')]
+    print(f"{'resolution':<10} {'scale':>5} {'roi':>4} {'cap fps':>8} {'inf fps':>8} {'str fps':>8} "
+          f"{'infer ms p50/95/99':>20} {'cursor ms p50/95/99':>21} {'cpu ms/frame':>12} {'cpu ms/inf':>10}")
+    for width, height in resolutions:
+        for settings in DETECTOR_SETTINGS:
+            source = build_source(args.source, width, height, args.realtime)
+            r = run(source, args.seconds, args.stream, width, height, **settings)
+            print(f"{width}x{height:<6} {settings['inference_scale']:>5} {str(settings['inference_roi'])[0]:>4} "
+                  f"{r['capture_fps']:>8.1f} {r['inference_fps']:>8.1f} {r['stream_fps']:>8.1f} "
+                  f"{fmt(r['inference_ms']):>20} {fmt(r['cursor']):>21} "
+                  f"{r['cpu_ms_per_frame']:>12.2f} {r['cpu_ms_per_inference']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
+import os
 from app import create_app
 
+if __name__ == '__main__':
+    # app.run below uses the reloader; FLASK_DEBUG tells create_app that this watcher
+    # process does not serve requests (its child does)
+    os.environ.setdefault('FLASK_DEBUG', '1')
+
 app = create_app()
 
 if __name__ == '__main__':
@@ -0,0 +1,32 @@
+from app.utils.event_stream import GestureEventHub, parse_last_event_id
+
+
+def test_new_subscriber_skips_history():
+    hub = GestureEventHub()
+    for t in range(5):
+        hub.publish(t, None, [('click',)])
+    last_seq = hub.attach()
+    assert hub.wait_for(last_seq, timeout=0) == []
+
+    hub.publish(5, None, [('click',)])
+    assert [p.seq for p in hub.wait_for(last_seq, timeout=0)] == [6]
+
+
+def test_resume_from_last_event_id():
+    hub = GestureEventHub()
+    for t in range(5):
+        hub.publish(t, None, [('click',)])
+    last_seq = hub.attach(parse_last_event_id('2'))
+    assert [p.seq for p in hub.wait_for(last_seq, timeout=0)] == [3, 4, 5]
+
+
+def test_last_event_id_from_the_future_starts_now():
+    hub = GestureEventHub()
+    hub.publish(0, None, [])
+    assert hub.attach(parse_last_event_id('99')) == 1
+
+
+def test_parse_last_event_id():
+    assert parse_last_event_id(None) is None
+    assert parse_last_event_id('abc') is None
+    assert parse_last_event_id(' 12 ') == 12
@@ -0,0 +1,88 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from app.utils import frame_source
+from app.utils.frame_source import CameraSource
+
+
+class StuckCapture:
+    """A VideoCapture whose reads block until `unblock` is set, recording misuse after release."""
+
+    def __init__(self, device):
+        self.unblock = threading.Event()
+        self.reading = threading.Event()
+        self.released = False
+        self.read_after_release = False
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        return cv2.VideoWriter_fourcc(*'MJPG') if prop == cv2.CAP_PROP_FOURCC else 0
+
+    def getBackendName(self):
+        return 'fake'
+
+    def read(self, out=None):
+        self.read_after_release |= self.released
+        self.reading.set()
+        self.unblock.wait()
+        return True, np.zeros((4, 4, 3), np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def capture(monkeypatch):
+    captures = []
+
+    def open_capture(device):
+        captures.append(StuckCapture(device))
+        return captures[-1]
+
+    monkeypatch.setattr(frame_source.cv2, 'VideoCapture', open_capture)
+    yield captures
+    for cap in captures:
+        cap.unblock.set()
+
+
+def test_camera_released_only_after_grabber_exits(capture):
+    source = CameraSource(timeout=0.1)
+    assert source.open()
+    cap = capture[0]
+    assert cap.reading.wait(1)
+
+    thread = source._thread
+    source.release()
+    # The grabber is still inside read(): the capture must not be released under it
+    assert thread.is_alive() and not cap.released
+
+    cap.unblock.set()
+    thread.join(1)
+    assert cap.released and not cap.read_after_release
+
+
+def test_reopen_while_old_grabber_is_stuck(capture):
+    source = CameraSource(timeout=0.1)
+    source.open()
+    capture[0].reading.wait(1)
+    stale = source._thread
+    source.release()
+
+    assert source.open()
+    capture[1].unblock.set()
+    success, img = source.read()
+    assert success and img.shape == (4, 4, 3)
+    # The stale grabber releases its own capture, not the new one
+    capture[0].unblock.set()
+    stale.join(1)
+    source.release()
+    assert capture[0].released and capture[1].released
+
@@ -0,0 +1,48 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('mediapipe')
+
+from app.utils.frame_source import SyntheticSource
+from app.utils.gesture_engine import RUNNING, STOPPED, GestureEngine
+
+
+def wait_until(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def engine():
+    # Paced so a run lasts long enough (0.3s) to be seen running
+    source = SyntheticSource(160, 120, fps=100, frames=30)
+    engine = GestureEngine(source=source, cursor='null', inference_hz=None, idle_after=None)
+    yield engine
+    engine.stop()
+
+
+def stage_threads():
+    return [t for t in threading.enumerate() if t.name.startswith('gesture-')]
+
+
+def test_finite_source_stops_the_engine(engine):
+    assert engine.start()
+    assert wait_until(lambda: not engine.is_running)
+    assert engine.state == STOPPED
+    assert wait_until(lambda: not stage_threads())
+
+
+def test_restart_after_source_ran_out(engine):
+    assert engine.start()
+    assert wait_until(lambda: not engine.is_running)
+
+    assert engine.start()
+    assert engine.state == RUNNING
+    assert wait_until(lambda: not engine.is_running)
+    assert engine.source.count == 30  # played from the start again
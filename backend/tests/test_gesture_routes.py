@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip('mediapipe')
+
+from app import db
+from app.models.product import Product
+from app.utils.engine_registry import registry
+from app.utils.garment_overlay import ANCHORS
+
+
+@pytest.fixture
+def jeans(app):
+    img = np.full((200, 100, 3), 255, dtype=np.uint8)
+    img[20:180, 20:80] = (120, 60, 20)
+    cv2.imwrite(f"{app.config['UPLOAD_FOLDER']}/jeans.png", img)
+    # clothing_type left at its 'upper' default, as for most existing products
+    product = Product(outlet_id=1, name='Jeans', category='Pants', price=40, image_url='/uploads/jeans.png')
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+@pytest.fixture
+def garments():
+    compositor = registry.get('default').garments
+    yield compositor
+    for slot in ('upper', 'lower'):
+        compositor.select(slot, None)
+
+
+def test_lower_slot_uses_hip_anchors(client, jeans, garments):
+    response = client.post('/api/gestures/garments', json={'lower': jeans.id})
+    assert response.status_code == 200
+    assert response.get_json()['data'] == {'lower': jeans.id}
+
+    asset = garments._garments['lower']
+    assert asset.kind == 'lower'
+    expected = [(x * asset.width, y * asset.height) for (x, y), _ in ANCHORS['lower']]
+    assert np.allclose(asset.anchors, expected)
+
+
+def test_clothing_type_wins_over_slot(client, jeans, garments):
+    jeans.clothing_type = 'full'
+    db.session.commit()
+    client.post('/api/gestures/garments', json={'upper': jeans.id})
+    assert garments._garments['upper'].kind == 'full'
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from app.utils.gesture_state import (CLICK, DRAG, IDLE, INDEX_PIP, INDEX_TIP, MIDDLE_PIP, MIDDLE_TIP, MOVE,
+                                     SCROLL, GestureStateMachine)
+
+STEP = 1 / 30
+
+
+def synthetic_hand(pose, x=0.5, y=0.5, spread=0.1):
+    """(21, 3) normalized landmarks for 'point', 'pinch', 'two' or 'fist', index fingertip at (x, y)."""
+    points = np.zeros((21, 3), dtype=np.float32)
+    points[:, 0], points[:, 1] = x, y + 0.15  # palm below the fingertips
+
+    index_up = pose != 'fist'
+    points[INDEX_PIP, :2] = x, y + 0.08
+    points[INDEX_TIP, :2] = (x, y) if index_up else (x, y + 0.12)
+
+    middle_up = pose in ('pinch', 'two')
+    mx = x + (0.01 if pose == 'pinch' else spread)
+    points[MIDDLE_PIP, :2] = mx, y + 0.08
+    points[MIDDLE_TIP, :2] = (mx, y) if middle_up else (mx, y + 0.12)
+    return points
+
+
+def replay(machine, segments, t=0.0):
+    """Feed (pose, seconds) segments at 30 fps; pose None is no hand. Returns ([(t, event)], end time).
+
+    A pose may also be a callable of the time within its segment returning landmarks.
+    """
+    events = []
+    for pose, seconds in segments:
+        start = t
+        for _ in range(round(seconds / STEP)):
+            if callable(pose):
+                points = pose(t - start)
+            else:
+                points = synthetic_hand(pose) if pose is not None else None
+            events.extend((t, event) for event in machine.update(t, points))
+            t += STEP
+    return events, t
+
+
+def kinds(events):
+    return [event[0] for _, event in events if event[0] != 'move']
+
+
+@pytest.fixture
+def machine():
+    return GestureStateMachine()
+
+
+def test_first_update_without_hand(machine):
+    assert machine.update(0.0, None) == []
+    assert machine.state == IDLE
+
+
+def test_point_moves_cursor(machine):
+    events, _ = replay(machine, [('point', 0.3)])
+    moves = [event for _, event in events if event[0] == 'move']
+    assert moves and moves[-1] == ('move', pytest.approx(0.5), pytest.approx(0.5))
+    assert machine.state == MOVE
+
+
+def test_click(machine):
+    events, _ = replay(machine, [('point', 0.2), ('pinch', 0.2), ('point', 0.2)])
+    assert kinds(events) == ['click']
+    assert machine.state in (CLICK, MOVE)
+
+
+def test_drag_down_and_up(machine):
+    events, _ = replay(machine, [('point', 0.2), ('pinch', machine.drag_delay + 0.2), ('point', 0.2)])
+    assert kinds(events) == ['down', 'up']
+    # The cursor keeps following the hand while dragging
+    down_at = next(t for t, event in events if event[0] == 'down')
+    up_at = next(t for t, event in events if event[0] == 'up')
+    assert any(event[0] == 'move' and down_at <= t < up_at for t, event in events)
+
+
+def test_drag_state_while_held(machine):
+    replay(machine, [('pinch', machine.drag_delay + 0.2)])
+    assert machine.state == DRAG
+
+
+def test_scroll_steps(machine):
+    # Two fingers apart, moving up by a quarter of the frame over half a second
+    def rising(elapsed):
+        return synthetic_hand('two', y=0.6 - 0.5 * elapsed)
+
+    events, _ = replay(machine, [(lambda _: synthetic_hand('two', y=0.6), 0.1), (rising, 0.5)])
+    steps = [event[1] for _, event in events if event[0] == 'scroll']
+    assert machine.state == SCROLL
+    assert all(step > 0 for step in steps)
+    # 0.25 frame heights at the default gain, less the travel before scrolling started
+    assert 10 <= sum(steps) <= machine.scroll_gain * 0.25
+
+
+def test_debounce_ignores_brief_pose(machine):
+    replay(machine, [('point', 0.2)])
+    events, t = replay(machine, [('pinch', machine.debounce / 2)], t=0.2)
+    events += replay(machine, [('point', 0.2)], t=t)[0]
+    assert kinds(events) == []
+    assert machine.state == MOVE
+
+
+def test_click_cooldown(machine):
+    machine.click_cooldown = 1.0
+    events, _ = replay(machine, [('point', 0.1), ('pinch', 0.1), ('point', 0.1), ('pinch', 0.1), ('point', 0.1)])
+    assert kinds(events) == ['click']
+
+    machine.reset()
+    machine.click_cooldown = 0.1
+    events, _ = replay(machine, [('point', 0.1), ('pinch', 0.1), ('point', 0.2), ('pinch', 0.1), ('point', 0.1)])
+    assert kinds(events) == ['click', 'click']
+
+
+def test_hand_lost_mid_drag_releases(machine):
+    events, _ = replay(machine, [('pinch', machine.drag_delay + 0.1), (None, 0.2)])
+    assert kinds(events) == ['down', 'up']
+    assert machine.state == IDLE
@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.mark.parametrize('outlet_id', ['abc', '1.5', None, [1]])
+def test_create_product_rejects_bad_outlet_id(client, outlet_id):
+    response = client.post('/api/products', json={'name': 'Tee', 'category': 'T-Shirts', 'price': 10,
+                                                   'outlet_id': outlet_id})
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'outlet_id must be an integer'}
+
+
+def test_create_product_requires_outlet_id(client):
+    response = client.post('/api/products', json={'name': 'Tee', 'category': 'T-Shirts', 'price': 10})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Missing required field: outlet_id'
+
+
+def test_create_product_accepts_form_outlet_id(client):
+    response = client.post('/api/products', data={'name': 'Tee', 'category': 'T-Shirts', 'price': '10',
+                                                  'outlet_id': '3'})
+    assert response.status_code == 201
+    assert response.get_json()['data']['outlet_id'] == 3
+
+
+def test_reprocess_rejects_bad_outlet_id(client):
+    response = client.post('/api/products/segmentation/reprocess', json={'outlet_id': 'abc'})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
@@ -0,0 +1,169 @@
+"""
+Record labelled hand poses and train the gesture classifier
+
+  record   runs hand tracking on a camera (or video / frames directory) and
+           appends the landmarks of every detected hand, with a label, to a
+           samples file. Record each gesture separately, a few hundred
+           samples each, moving the hand around and varying the distance.
+  train    fits a GestureClassifier to the samples, reports accuracy on a
+           held-out split and the time per classification, and saves the model.
+  list     shows how many samples each label has.
+
+The engine uses the model when GESTURE_MODEL points at it. The labels
+'point', 'pinch' and 'two' drive the cursor (move, click/drag, scroll); any
+other label is sent to clients as a ('gesture', label) event.
+
+Usage:
+cd backend
+python train_gestures.py record --label point [--seconds 15] [--source 0] [--preview]
+python train_gestures.py train [--kind centroid|mlp]
+python train_gestures.py list
+"""
+
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from app.utils.frame_source import make_source
+from app.utils.gesture_classifier import GestureClassifier
+from app.utils.hand_tracking import HandDetector, draw_hands
+
+INSTANCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+DEFAULT_SAMPLES = os.path.join(INSTANCE, 'gesture_samples.npz')
+DEFAULT_MODEL = os.path.join(INSTANCE, 'gesture_model.npz')
+
+
+def load_samples(path):
+    if not os.path.exists(path):
+        return np.zeros((0, 21, 3), np.float32), np.array([], dtype=str), np.array([], dtype=str)
+    with np.load(path) as data:
+        return data['points'], data['labels'], data['handedness']
+
+
+def record(args):
+    source = make_source(int(args.source) if args.source.isdigit() else args.source, 640, 480, 30)
+    if not source.open():
+        raise SystemExit(f"Could not open source {args.source}")
+    detector = HandDetector(detectionCon=0.7, trackCon=0.7)
+
+    for i in range(args.countdown, 0, -1):
+        print(f"Recording '{args.label}' in {i}...")
+        time.sleep(1)
+    print(f"Recording '{args.label}' for {args.seconds}s")
+
+    points, handedness = [], []
+    frames = 0
+    end = time.monotonic() + args.seconds
+    try:
+        while time.monotonic() < end:
+            success, img = source.read()
+            if not success:
+                if source.exhausted:
+                    break
+                continue
+            img = cv2.flip(img, 1)  # mirrored like the engine's frames
+            hands = detector.findHands(img)
+            frames += 1
+            if len(hands) and frames % args.every == 0:
+                points.append(hands.points[0].copy())
+                handedness.append(hands.handedness[0] or '')
+            if args.preview:
+                draw_hands(img, hands)
+                cv2.putText(img, f"{args.label}: {len(points)}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                cv2.imshow('Recording', img)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+    finally:
+        source.release()
+        detector.close()
+        if args.preview:
+            cv2.destroyAllWindows()
+
+    if not points:
+        raise SystemExit("No hand was detected, nothing recorded")
+    old_points, old_labels, old_handedness = load_samples(args.samples)
+    os.makedirs(os.path.dirname(os.path.abspath(args.samples)), exist_ok=True)
+    np.savez(args.samples,
+             points=np.concatenate([old_points, np.stack(points)]),
+             labels=np.concatenate([old_labels, [args.label] * len(points)]),
+             handedness=np.concatenate([old_handedness, handedness]))
+    print(f"Added {len(points)} samples of '{args.label}' from {frames} frames to {args.samples}")
+
+
+def train(args):
+    points, labels, handedness = load_samples(args.samples)
+    names = np.unique(labels)
+    if len(names) < 2:
+        raise SystemExit(f"Need samples of at least two gestures in {args.samples}, found {list(names)}")
+
+    # Held-out split per label so every gesture is evaluated
+    rng = np.random.default_rng(args.seed)
+    test = np.zeros(len(labels), dtype=bool)
+    for name in names:
+        idx = np.flatnonzero(labels == name)
+        test[rng.choice(idx, size=int(len(idx) * args.holdout), replace=False)] = True
+
+    model = GestureClassifier.train(points[~test], labels[~test], handedness[~test], kind=args.kind)
+    if test.any():
+        predicted, _ = model.predict(points[test], handedness[test])
+        predicted = np.array([p if p is not None else '(rejected)' for p in predicted])
+        print(f"Held-out accuracy: {np.mean(predicted == labels[test]):.1%} on {test.sum()} samples")
+        for name in names:
+            mask = labels[test] == name
+            if mask.any():
+                print(f"  {name:<16} {np.mean(predicted[mask] == name):>6.1%}  ({mask.sum()} samples)")
+
+    runs = 1000
+    start = time.perf_counter()
+    for i in range(runs):
+        model.classify(points[i % len(points)], handedness[i % len(points)])
+    print(f"Classification: {(time.perf_counter() - start) / runs * 1000:.3f} ms per hand")
+
+    # The saved model is fitted on every sample
+    model = GestureClassifier.train(points, labels, handedness, kind=args.kind)
+    os.makedirs(os.path.dirname(os.path.abspath(args.model)), exist_ok=True)
+    model.save(args.model)
+    print(f"Saved {args.kind} model for {', '.join(model.labels)} to {args.model}")
+
+
+def list_samples(args):
+    _, labels, _ = load_samples(args.samples)
+    names, counts = np.unique(labels, return_counts=True)
+    for name, count in zip(names, counts):
+        print(f"{name:<16} {count}")
+    print(f"{len(labels)} samples in {args.samples}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', default=DEFAULT_SAMPLES)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rec = commands.add_parser('record', help='record samples of one gesture')
+    rec.add_argument('--label', required=True)
+    rec.add_argument('--seconds', type=float, default=15)
+    rec.add_argument('--source', default='0', help='camera index, video file or frames directory')
+    rec.add_argument('--every', type=int, default=2, help='keep every Nth detected frame')
+    rec.add_argument('--countdown', type=int, default=3)
+    rec.add_argument('--preview', action='store_true', help='show the camera with landmarks')
+    rec.set_defaults(run=record)
+
+    fit = commands.add_parser('train', help='train and save a model from the samples')
+    fit.add_argument('--kind', choices=('centroid', 'mlp'), default='centroid')
+    fit.add_argument('--model', default=DEFAULT_MODEL)
+    fit.add_argument('--holdout', type=float, default=0.2, help='fraction of each label held out for evaluation')
+    fit.add_argument('--seed', type=int, default=0)
+    fit.set_defaults(run=train)
+
+    show = commands.add_parser('list', help='count the recorded samples per label')
+    show.set_defaults(run=list_samples)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -89,6 +89,13 @@ const TryOn = () => {
         setGestureMode(true);
     }, []);
 
+    // Show the selected garments on the body in the backend stream
+    useEffect(() => {
+        if (!cameraActive) return;
+        gesturesAPI.setGarments(selectedUpper?.id ?? null, selectedLower?.id ?? null)
+            .catch(err => console.error("Garment overlay failed:", err));
+    }, [cameraActive, selectedUpper, selectedLower]);
+
     // Cleanup camera and gestures on unmount
     useEffect(() => {
         return () => {
@@ -501,7 +508,12 @@ const TryOn = () => {
                     <div className="absolute inset-0 bg-slate-950">
                         {cameraActive ? (
                             <img
-                                src="http://localhost:5000/api/gestures/video_feed"
+                                src="http://localhost:5001/api/gestures/video_feed?overlay=1"
+                                // Stream server not running (GESTURE_STREAM_PORT=0): use the API's own route
+                                onError={(e) => {
+                                    const fallback = 'http://localhost:5000/api/gestures/video_feed?overlay=1';
+                                    if (e.currentTarget.src !== fallback) e.currentTarget.src = fallback;
+                                }}
                                 alt="Gesture Feed"
                                 className="w-full h-full object-cover"
                             />
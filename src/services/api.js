@@ -228,6 +228,13 @@ export const gesturesAPI = {
     },
     status: async () => {
         return apiRequest('/gestures/status');
+    },
+    // Garments composited onto the try-on stream; null clears a slot
+    setGarments: async (upper, lower) => {
+        return apiRequest('/gestures/garments', {
+            method: 'POST',
+            body: JSON.stringify({ upper, lower }),
+        });
     }
 };
 